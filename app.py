@@ -2,16 +2,17 @@ import streamlit as st
 import tempfile
 import os
 from pathlib import Path
-import time
 from datetime import datetime
 from codescan import CodeAnalyzer
-from utils import display_code_with_highlights, create_file_tree
+from git_delta import read_file_at
+from utils import display_code_with_highlights, create_file_tree, build_file_tree, collect_hit_lines, display_highlighted_hits
 from styles import apply_custom_styles
 import base64
 import io  # Add io import for BytesIO
 import plotly.express as px
 import plotly.graph_objects as go
 from collections import Counter
+from functools import partial
 import pandas as pd
 from fuzzywuzzy import process, fuzz
 
@@ -342,6 +343,95 @@ def download_dataframe(df, file_name, file_format='excel', button_text="Download
     return download_link
 
 
+def build_demographic_summary_df(results):
+    """Build the Demographic Fields Summary table as a single DataFrame"""
+    rows = []
+    for file_detail in results['summary']['file_details']:
+        if file_detail['demographic_fields_found'] == 0:
+            continue
+        file_path = file_detail['file_path']
+        unique_fields = list(results['demographic_data'].get(file_path, {}).keys())
+        rows.append({
+            'File Analyzed': os.path.basename(file_path),
+            'Fields Found': file_detail['demographic_fields_found'],
+            'Fields': ', '.join(unique_fields),
+            'File Path': file_path
+        })
+
+    df = pd.DataFrame(rows, columns=['File Analyzed', 'Fields Found', 'Fields', 'File Path'])
+    df.insert(0, '#', range(1, len(df) + 1))
+    return df
+
+
+def build_integration_summary_df(results):
+    """Build the Integration Patterns Summary table as a single DataFrame"""
+    # Group pattern details by file once instead of rescanning all patterns per file
+    pattern_details = {}
+    for pattern in results['integration_patterns']:
+        pattern_details.setdefault(pattern['file_path'], set()).add(
+            f"{pattern['pattern_type']}: {pattern['sub_type']}"
+        )
+
+    rows = []
+    for file_detail in results['summary']['file_details']:
+        if file_detail['integration_patterns_found'] == 0:
+            continue
+        file_path = file_detail['file_path']
+        rows.append({
+            'File Name': os.path.basename(file_path),
+            'Patterns Found': file_detail['integration_patterns_found'],
+            'Pattern Details': ', '.join(sorted(pattern_details.get(file_path, ()))),
+            'File Path': file_path
+        })
+
+    df = pd.DataFrame(rows, columns=['File Name', 'Patterns Found', 'Pattern Details', 'File Path'])
+    df.insert(0, '#', range(1, len(df) + 1))
+    return df
+
+
+def render_paginated_table(df, key, page_sizes=(25, 50, 100, 250)):
+    """Render a DataFrame with server-side filtering, sorting and pagination.
+
+    Only the current page is sent to the browser, so render cost depends on
+    the page size rather than on the number of rows.
+    """
+    filter_col, sort_col, order_col, size_col = st.columns([3, 2, 1, 1])
+    filter_text = filter_col.text_input("Filter", key=f"{key}_filter")
+    sort_by = sort_col.selectbox("Sort by", list(df.columns), key=f"{key}_sort")
+    ascending = order_col.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order") == "Ascending"
+    page_size = size_col.selectbox("Rows per page", page_sizes, key=f"{key}_page_size")
+
+    view = df
+    if filter_text:
+        text_columns = [col for col in df.columns if df[col].dtype == object]
+        mask = pd.Series(False, index=df.index)
+        for col in text_columns:
+            mask |= df[col].str.contains(filter_text, case=False, regex=False, na=False)
+        view = df[mask]
+
+    view = view.sort_values(sort_by, ascending=ascending, kind='stable')
+
+    total_pages = max(1, -(-len(view) // page_size))
+    # Filtering or a larger page size can shrink the page count below the current page
+    if st.session_state.get(f"{key}_page", 1) > total_pages:
+        st.session_state[f"{key}_page"] = 1
+    page = st.number_input(
+        f"Page (of {total_pages})",
+        min_value=1,
+        max_value=total_pages,
+        step=1,
+        key=f"{key}_page"
+    )
+    start = (int(page) - 1) * page_size
+
+    st.dataframe(
+        view.iloc[start:start + page_size],
+        hide_index=True,
+        use_container_width=True
+    )
+    st.caption(f"Showing {min(start + 1, len(view))}-{min(start + page_size, len(view))} of {len(view)} rows")
+
+
 def show_code_analysis():
     """Display code analysis interface"""
     st.title("🔍 CodeLens")
@@ -356,188 +446,353 @@ def show_code_analysis():
     # Application name input
     app_name = st.sidebar.text_input("Application Name", "MyApp")
 
+    # Encrypted sources (e.g. Foo.java.enc) are decrypted in memory only when a key is given
+    decryption_key = st.sidebar.text_input(
+        "Decryption Key (for .enc files)",
+        type="password",
+        help="Key used with encrypt_decrypt_java.py; leave empty to skip encrypted files"
+    )
+    report_encrypted_snippets = st.sidebar.checkbox(
+        "Write Encrypted Code to Report",
+        value=False,
+        help="By default the HTML report saved to disk redacts code from .enc files; tick to include the plaintext"
+    )
+
+    # Context captured from the in-memory buffer during the scan
+    context_lines = st.sidebar.number_input(
+        "Snippet Context Lines",
+        min_value=0,
+        max_value=20,
+        value=0,
+        help="Lines kept before and after each hit; overlapping windows are stored once"
+    )
+
+    # Client field lists, language-specific patterns and fingerprints (see pattern_packs.py)
+    pack_files = st.sidebar.file_uploader(
+        "Pattern Packs (YAML/JSON)",
+        accept_multiple_files=True,
+        type=['yaml', 'yml', 'json']
+    )
+
+    skip_generated = st.sidebar.checkbox(
+        "Skip Minified/Generated Files",
+        value=True,
+        help="Files such as *.min.js or those marked @generated are listed but not scanned"
+    )
+    language_aware = st.sidebar.checkbox(
+        "Skip Comments and Long Strings",
+        value=False,
+        help="Ignore matches in comments, docstrings and long prose strings; short and SQL strings are still scanned"
+    )
+    identifier_mode = st.sidebar.checkbox(
+        "Match Identifiers Only (Python/Java)",
+        value=False,
+        help="Parse .py and .java files and match declared names, annotations and string literals instead of raw lines"
+    )
+
+    # Scan instrumentation; adds per-pattern timers, so it is off by default
+    collect_metrics = st.sidebar.checkbox("Collect Performance Metrics", value=False)
+    write_profile = st.sidebar.checkbox(
+        "Write cProfile Dump",
+        value=False,
+        help="Profiles the whole scan and saves <app>_CodeLens_profile.prof in the working directory"
+    )
+
     analysis_triggered = False
-    temp_dir = None
+    sources = None
+    base_ref = head_ref = None
 
     if input_method == "Upload Files":
         uploaded_files = st.sidebar.file_uploader(
-            "Upload Code Files",
+            "Upload Code Files or Archives",
             accept_multiple_files=True,
-            type=['py', 'java', 'js', 'ts', 'cs', 'php', 'rb', 'xsd']
+            type=['py', 'java', 'js', 'ts', 'cs', 'php', 'rb', 'xsd', 'enc', 'zip', 'tar', 'gz', 'tgz']
         )
 
-        if uploaded_files:
-            temp_dir = tempfile.mkdtemp()
-            for uploaded_file in uploaded_files:
-                file_path = os.path.join(temp_dir, uploaded_file.name)
-                with open(file_path, 'wb') as f:
-                    f.write(uploaded_file.getbuffer())
-
-            if st.sidebar.button("Run Analysis"):
-                analysis_triggered = True
-                repo_path = temp_dir
+        # Uploads are scanned from memory; archives are read member by member, never extracted,
+        # and a gzipped file (Foo.java.gz) is scanned as the file inside
+        if uploaded_files and st.sidebar.button("Run Analysis"):
+            analysis_triggered = True
+            repo_path = "uploads"
+            sources = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
 
     else:
         repo_path = st.sidebar.text_input("Enter Repository Path")
+        # Differential scan of a git repository: only files changed between the refs
+        base_ref = st.sidebar.text_input(
+            "Base Ref (optional)",
+            help="Branch, tag or commit; when set, only files changed between Base Ref and Head Ref are scanned"
+        )
+        head_ref = st.sidebar.text_input("Head Ref", value="HEAD")
         if repo_path and st.sidebar.button("Run Analysis"):
             analysis_triggered = True
 
     if analysis_triggered:
+        pack_dir = None
         try:
+            pack_paths = []
+            if pack_files:
+                pack_dir = tempfile.mkdtemp()
+                for pack_file in pack_files:
+                    pack_path = os.path.join(pack_dir, pack_file.name)
+                    with open(pack_path, 'wb') as f:
+                        f.write(pack_file.getbuffer())
+                    pack_paths.append(pack_path)
+
             with st.spinner("Analyzing code..."):
-                analyzer = CodeAnalyzer(repo_path, app_name)
+                analyzer = CodeAnalyzer(
+                    repo_path,
+                    app_name,
+                    decryption_key=decryption_key or None,
+                    report_encrypted_snippets=report_encrypted_snippets,
+                    context_lines=int(context_lines),
+                    instrument=collect_metrics,
+                    skip_generated=skip_generated,
+                    language_aware=language_aware,
+                    identifier_mode=identifier_mode,
+                    pattern_packs=pack_paths,
+                    base_ref=base_ref or None,
+                    head_ref=head_ref or 'HEAD',
+                    sources=sources,
+                    profile_output=f"{app_name}_CodeLens_profile.prof" if write_profile else None
+                )
                 progress_bar = st.progress(0)
 
                 # Run analysis
                 results = analyzer.scan_repository()
                 progress_bar.progress(100)
 
-                # Create tabs for Dashboard, Analysis Results, Export Reports, and Logs
-                tab1, tab2, tab3, tab4 = st.tabs(["Dashboard", "Analysis Results", "Export Reports", "Log"])
-
-                with tab1:
-                    st.header("Analysis Dashboard")
-                    st.markdown("""
-                    This dashboard provides visual insights into the code analysis results,
-                    showing distributions of files, demographic fields, and integration patterns.
-                    """)
-                    create_dashboard_charts(results)
-
-                with tab2:
-                    # Summary Stats
-                    st.subheader("Summary")
-                    stats_cols = st.columns(4)
-                    stats_cols[0].metric("Files Analyzed", results['summary']['files_analyzed'])
-                    stats_cols[1].metric("Demographic Fields", results['summary']['demographic_fields_found'])
-                    stats_cols[2].metric("Integration Patterns", results['summary']['integration_patterns_found'])
-                    stats_cols[3].metric("Unique Fields", len(results['summary']['unique_demographic_fields']))
-
-                    # Demographic Fields Summary Table
-                    st.subheader("Demographic Fields Summary")
-                    demographic_files = [f for f in results['summary']['file_details'] if f['demographic_fields_found'] > 0]
-                    if demographic_files:
-                        cols = st.columns([0.5, 2, 1, 2])
-                        cols[0].markdown("**#**")
-                        cols[1].markdown("**File Analyzed**")
-                        cols[2].markdown("**Fields Found**")
-                        cols[3].markdown("**Fields**")
-
-                        for idx, file_detail in enumerate(demographic_files, 1):
-                            file_path = file_detail['file_path']
-                            unique_fields = []
-                            if file_path in results['demographic_data']:
-                                unique_fields = list(results['demographic_data'][file_path].keys())
-
-                            cols = st.columns([0.5, 2, 1, 2])
-                            cols[0].text(str(idx))
-                            cols[1].text(os.path.basename(file_path))
-                            cols[2].text(str(file_detail['demographic_fields_found']))
-                            cols[3].text(', '.join(unique_fields))
-
-                    # Integration Patterns Summary Table
-                    st.subheader("Integration Patterns Summary")
-                    integration_files = [f for f in results['summary']['file_details'] if f['integration_patterns_found'] > 0]
-                    if integration_files:
-                        cols = st.columns([0.5, 2, 1, 2])
-                        cols[0].markdown("**#**")
-                        cols[1].markdown("**File Name**")
-                        cols[2].markdown("**Patterns Found**")
-                        cols[3].markdown("**Pattern Details**")
-
-                        for idx, file_detail in enumerate(integration_files, 1):
-                            file_path = file_detail['file_path']
-                            pattern_details = set()
-                            for pattern in results['integration_patterns']:
-                                if pattern['file_path'] == file_path:
-                                    pattern_details.add(f"{pattern['pattern_type']}: {pattern['sub_type']}")
-
-                            cols = st.columns([0.5, 2, 1, 2])
-                            cols[0].text(str(idx))
-                            cols[1].text(os.path.basename(file_path))
-                            cols[2].text(str(file_detail['integration_patterns_found']))
-                            cols[3].text(', '.join(pattern_details))
-
-                with tab3:
-                    st.header("Available Reports")
-
-                    # Get all report files and filter by app_name
-                    report_files = [
-                        f for f in os.listdir()
-                        if f.endswith('.html')
-                        and 'CodeLens' in f
-                        and f.startswith(app_name)
-                    ]
-
-                    # Sort files by timestamp in descending order
-                    report_files.sort(key=parse_timestamp_from_filename, reverse=True)
-
-                    if report_files:
-                        # Create a table with five columns
-                        cols = st.columns([1, 3, 2, 2, 2])
-                        cols[0].markdown("**S.No**")
-                        cols[1].markdown("**File Name**")
-                        cols[2].markdown("**Date**")
-                        cols[3].markdown("**Time**")
-                        cols[4].markdown("**Download**")
-
-                        # List all reports
-                        for idx, report_file in enumerate(report_files, 1):
-                            cols = st.columns([1, 3, 2, 2, 2])
-
-                            # Serial number column
-                            cols[0].text(f"{idx}")
-
-                            # File name column without .html extension
-                            display_name = report_file.replace('.html', '')
-                            cols[1].text(display_name)
-
-                            # Extract timestamp and format date and time separately
-                            timestamp = parse_timestamp_from_filename(report_file)
-                            # Date in DD-MMM-YYYY format
-                            cols[2].text(timestamp.strftime('%d-%b-%Y'))
-                            # Time in 12-hour format with AM/PM
-                            cols[3].text(timestamp.strftime('%I:%M:%S %p'))
-
-                            # Download button column (last)
-                            cols[4].markdown(
-                                get_file_download_link(report_file),
-                                unsafe_allow_html=True
-                            )
-                    else:
-                        st.info("No reports available for this application.")
-
-                with tab4:
-                    st.header("Analysis Log")
-                    # Add auto-refresh checkbox
-                    auto_refresh = st.checkbox("Auto-refresh logs", value=True)
-
-                    # Create a container for logs
-                    log_container = st.empty()
-
-                    def update_logs():
-                        logs = read_log_file()
-                        if logs:
-                            log_content = "".join(logs)
-                            log_container.code(log_content, language="text")
-                        else:
-                            log_container.info("No logs available")
-
-                    # Initial log display
-                    update_logs()
-
-                    # Auto-refresh logs every 5 seconds if enabled
-                    if auto_refresh:
-                        while True:
-                            time.sleep(5)
-                            update_logs()
-
+                # Keep results in session state so paging/filtering the tables
+                # does not discard them on rerun
+                st.session_state.code_results = results
+                st.session_state.code_app_name = app_name
+                st.session_state.code_tables = {
+                    'demographic': build_demographic_summary_df(results),
+                    'integration': build_integration_summary_df(results),
+                    'hits': collect_hit_lines(results),
+                    'tree': build_file_tree(results['summary']['file_details'], repo_path)
+                }
         except Exception as e:
+            st.session_state.code_results = None
             st.error(f"Error during analysis: {str(e)}")
 
         finally:
-            if temp_dir:
+            if pack_dir:
                 import shutil
-                shutil.rmtree(temp_dir)
+                shutil.rmtree(pack_dir)
+
+    if st.session_state.get('code_results') is not None:
+        show_code_analysis_results(
+            st.session_state.code_results,
+            st.session_state.code_tables,
+            st.session_state.code_app_name
+        )
+
+def show_code_analysis_results(results, tables, app_name):
+    """Display the Dashboard, Analysis Results, Export Reports and Log tabs"""
+    # Create tabs for Dashboard, Analysis Results, Export Reports, and Logs
+    tab1, tab2, tab3, tab4 = st.tabs(["Dashboard", "Analysis Results", "Export Reports", "Log"])
+
+    with tab1:
+        st.header("Analysis Dashboard")
+        st.markdown("""
+        This dashboard provides visual insights into the code analysis results,
+        showing distributions of files, demographic fields, and integration patterns.
+        """)
+        create_dashboard_charts(results)
+        show_performance_panel(results['metadata'])
+
+    with tab2:
+        # Summary Stats
+        st.subheader("Summary")
+        stats_cols = st.columns(4)
+        stats_cols[0].metric("Files Analyzed", results['summary']['files_analyzed'])
+        stats_cols[1].metric("Demographic Fields", results['summary']['demographic_fields_found'])
+        stats_cols[2].metric("Integration Patterns", results['summary']['integration_patterns_found'])
+        stats_cols[3].metric("Unique Fields", len(results['summary']['unique_demographic_fields']))
+
+        generated_files = results['summary'].get('generated_files', [])
+        if generated_files:
+            with st.expander(f"⚠️ {len(generated_files)} minified or generated files detected"):
+                st.dataframe(
+                    pd.DataFrame(generated_files).rename(columns={'file_path': 'File Path', 'reason': 'Reason'}),
+                    hide_index=True,
+                    use_container_width=True
+                )
+        if results.get('fingerprints'):
+            with st.expander(f"🔎 Fingerprints matched in {len(results['fingerprints'])} files"):
+                st.dataframe(
+                    pd.DataFrame([
+                        {'File Path': file_path, 'Fingerprints': ', '.join(names)}
+                        for file_path, names in results['fingerprints'].items()
+                    ]),
+                    hide_index=True,
+                    use_container_width=True
+                )
+        if results['summary'].get('oversized_lines'):
+            st.caption(f"{results['summary']['oversized_lines']} oversized lines were matched in bounded windows")
+
+        if results.get('delta'):
+            show_delta_summary(results['delta'])
+
+        # Demographic Fields Summary Table
+        st.subheader("Demographic Fields Summary")
+        if not tables['demographic'].empty:
+            render_paginated_table(tables['demographic'], key="demographic_summary")
+
+        # Integration Patterns Summary Table
+        st.subheader("Integration Patterns Summary")
+        if not tables['integration'].empty:
+            render_paginated_table(tables['integration'], key="integration_summary")
+
+        # Repository tree with per-directory hit badges, expanded on demand
+        st.subheader("Repository Tree")
+        create_file_tree(tables['tree'], key="repo_tree")
+
+        # Highlighted source around each hit, rendered one page of files at a time
+        st.subheader("Highlighted Hits")
+        context_lines = st.number_input("Context lines", min_value=0, max_value=20, value=2, key="hits_context")
+        # Differential scans analyzed the head commit, which need not be checked out
+        read_source = None
+        if 'delta' in results:
+            read_source = partial(
+                read_file_at, Path(results['metadata']['repository_path']), results['delta']['head_commit']
+            )
+        display_highlighted_hits(
+            tables['hits'],
+            key="highlighted_hits",
+            context=int(context_lines),
+            context_windows=results.get('context_windows'),
+            read_source=read_source
+        )
+
+    with tab3:
+        st.header("Available Reports")
+
+        # Get all report files and filter by app_name
+        report_files = [
+            f for f in os.listdir()
+            if f.endswith('.html')
+            and 'CodeLens' in f
+            and f.startswith(app_name)
+        ]
+
+        # Sort files by timestamp in descending order
+        report_files.sort(key=parse_timestamp_from_filename, reverse=True)
+
+        if report_files:
+            # Create a table with five columns
+            cols = st.columns([1, 3, 2, 2, 2])
+            cols[0].markdown("**S.No**")
+            cols[1].markdown("**File Name**")
+            cols[2].markdown("**Date**")
+            cols[3].markdown("**Time**")
+            cols[4].markdown("**Download**")
+
+            # List all reports
+            for idx, report_file in enumerate(report_files, 1):
+                cols = st.columns([1, 3, 2, 2, 2])
+
+                # Serial number column
+                cols[0].text(f"{idx}")
+
+                # File name column without .html extension
+                display_name = report_file.replace('.html', '')
+                cols[1].text(display_name)
+
+                # Extract timestamp and format date and time separately
+                timestamp = parse_timestamp_from_filename(report_file)
+                # Date in DD-MMM-YYYY format
+                cols[2].text(timestamp.strftime('%d-%b-%Y'))
+                # Time in 12-hour format with AM/PM
+                cols[3].text(timestamp.strftime('%I:%M:%S %p'))
+
+                # Download button column (last)
+                cols[4].markdown(
+                    get_file_download_link(report_file),
+                    unsafe_allow_html=True
+                )
+        else:
+            st.info("No reports available for this application.")
+
+    with tab4:
+        st.header("Analysis Log")
+        # Add auto-refresh checkbox
+        auto_refresh = st.checkbox("Auto-refresh logs", value=True)
+
+        # Only this fragment reruns, every 5 seconds while auto-refresh is enabled,
+        # so the rest of the page stays responsive
+        @st.fragment(run_every=5 if auto_refresh else None)
+        def show_logs():
+            logs = read_log_file()
+            if logs:
+                st.code("".join(logs), language="text")
+            else:
+                st.info("No logs available")
+
+        show_logs()
+
+
+def show_delta_summary(delta):
+    """Show the occurrences added and removed by a differential (base..head) scan"""
+    st.subheader(f"Changes {delta['base_ref']}..{delta['head_ref']}")
+    delta_cols = st.columns(5)
+    delta_cols[0].metric("Changed Files", len(delta['files']))
+    delta_cols[1].metric("Fields Added", len(delta['demographic_added']))
+    delta_cols[2].metric("Fields Removed", len(delta['demographic_removed']))
+    delta_cols[3].metric("Integrations Added", len(delta['integration_added']))
+    delta_cols[4].metric("Integrations Removed", len(delta['integration_removed']))
+
+    for title, kind in (
+        ("Demographic Fields Added", 'demographic_added'),
+        ("Demographic Fields Removed", 'demographic_removed'),
+        ("Integration Patterns Added", 'integration_added'),
+        ("Integration Patterns Removed", 'integration_removed')
+    ):
+        if delta[kind]:
+            with st.expander(f"{title} ({len(delta[kind])})"):
+                render_paginated_table(pd.DataFrame(delta[kind]), key=f"delta_{kind}")
+
+def show_performance_panel(metadata):
+    """Show scan instrumentation collected with CodeAnalyzer(instrument=True)"""
+    performance = metadata.get('performance')
+    if not performance and not metadata.get('profile_output'):
+        return
+
+    st.markdown("----")
+    st.subheader("Scan Performance")
+    if metadata.get('profile_output'):
+        st.caption(f"cProfile stats written to {metadata['profile_output']}")
+    if not performance:
+        return
+
+    phases = pd.DataFrame([
+        {'Phase': name, 'Wall (s)': timing['wall_s'], 'CPU (s)': timing['cpu_s']}
+        for name, timing in performance['phases'].items()
+    ])
+    col1, col2 = st.columns(2)
+    with col1:
+        fig_phases = px.bar(phases, x='Phase', y='Wall (s)', title="Time by Phase")
+        st.plotly_chart(fig_phases, use_container_width=True)
+    with col2:
+        st.markdown("**Slowest Files**")
+        st.dataframe(
+            pd.DataFrame(performance['slowest_files']).rename(
+                columns={'file_path': 'File Path', 'seconds': 'Seconds'}
+            ),
+            hide_index=True,
+            use_container_width=True
+        )
+
+    st.markdown("**Match Time by Pattern**")
+    st.dataframe(
+        pd.DataFrame(performance['patterns']).rename(
+            columns={'pattern': 'Pattern', 'seconds': 'Seconds', 'matches': 'Matches'}
+        ),
+        hide_index=True,
+        use_container_width=True
+    )
+
 
 def create_dashboard_charts(results):
     """Create visualization charts for the dashboard"""
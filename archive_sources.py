@@ -0,0 +1,109 @@
+"""
+In-memory sources for the code scanner: uploaded files, gzipped files and
+zip/tar archives.
+
+Archive members are read one at a time straight from the archive (tar files
+as a stream) and handed to the scanner as bytes, so an uploaded repository
+is never extracted to disk. A gzipped single file ('Foo.java.gz') is scanned
+as the file inside it. Member paths are only used as labels, and are
+normalised so absolute or '..' paths cannot point outside the archive.
+"""
+import gzip
+import io
+import logging
+import tarfile
+import zipfile
+from pathlib import PurePosixPath
+from typing import Iterable, Iterator, Tuple
+
+ZIP_SUFFIXES = ('.zip', '.jar', '.war', '.ear')
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+# Members larger than this are skipped rather than read into memory
+MAX_MEMBER_BYTES = 64 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def is_archive(name: str) -> bool:
+    """Check for a zip or tar archive by file name"""
+    return str(name).lower().endswith(ZIP_SUFFIXES + TAR_SUFFIXES)
+
+
+def is_gzip_file(name: str) -> bool:
+    """Check for a single gzipped file (not a gzipped tar) by file name"""
+    return str(name).lower().endswith('.gz') and not is_archive(name)
+
+
+def member_path(name: str) -> str:
+    """Archive member name as a relative path, without root, '.' or '..' parts"""
+    parts = PurePosixPath(name.replace('\\', '/')).parts
+    return '/'.join(part for part in parts if part not in ('/', '.', '..'))
+
+
+def _too_large(archive_name: str, member_name: str, size: int) -> bool:
+    if size > MAX_MEMBER_BYTES:
+        logger.warning(f"Skipping {archive_name}/{member_name}: {size} bytes exceeds the member limit")
+        return True
+    return False
+
+
+def iter_archive(fileobj, name: str, wanted=None) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield (member path, content) for the regular files of a zip or tar archive.
+    wanted(member path) -> bool, when given, skips members before they are read.
+    """
+    if str(name).lower().endswith(ZIP_SUFFIXES):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or (wanted and not wanted(member_path(info.filename))):
+                    continue
+                if not _too_large(name, info.filename, info.file_size):
+                    yield member_path(info.filename), archive.read(info)
+    else:
+        # Stream mode reads members in order without seeking, so large uploads are never buffered whole
+        with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+            for member in archive:
+                if not member.isfile() or (wanted and not wanted(member_path(member.name))):
+                    continue
+                if not _too_large(name, member.name, member.size):
+                    yield member_path(member.name), archive.extractfile(member).read()
+
+
+def iter_sources(sources: Iterable[Tuple[str, object]], wanted=None) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield (path, content) for (name, bytes or binary file object) sources.
+    Archives are expanded, their members named '<archive name>/<member path>';
+    wanted(path) is checked against those same names.
+    """
+    for name, source in sources:
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        if is_archive(name):
+            prefix = member_path(name)
+            archive_wanted = wanted and (lambda member: wanted(f"{prefix}/{member}"))
+            try:
+                for member_name, content in iter_archive(source, name, archive_wanted):
+                    yield f"{prefix}/{member_name}", content
+            except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+                logger.error(f"Error reading archive {name}: {str(e)}")
+            continue
+
+        gzipped = is_gzip_file(name)
+        path = member_path(name)[:-len('.gz')] if gzipped else member_path(name)
+        if wanted is not None and not wanted(path):
+            logger.warning(f"Skipping {name}: not a supported source file")
+            continue
+        if not gzipped:
+            yield path, source.read()
+            continue
+        try:
+            # One byte past the limit is enough to tell an oversized file apart
+            with gzip.GzipFile(fileobj=source) as gzip_file:
+                content = gzip_file.read(MAX_MEMBER_BYTES + 1)
+        except (EOFError, OSError) as e:
+            logger.error(f"Error reading gzipped file {name}: {str(e)}")
+            continue
+        if len(content) > MAX_MEMBER_BYTES:
+            logger.warning(f"Skipping {name}: more than {MAX_MEMBER_BYTES} bytes uncompressed")
+            continue
+        yield path, content
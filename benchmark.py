@@ -0,0 +1,385 @@
+"""
+Reproducible performance benchmarks for CodeLens.
+
+Generates synthetic code repositories (plain and encrypted), C360/metadata
+spreadsheets and mainframe members, then times the scanner, matcher,
+in-memory decryption, report generator, attribute comparison and mainframe
+DFD analysis, and the memory retained by scan results. Results are written as
+JSON so runs from different commits can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+DEMOGRAPHIC_WORDS = [
+    'customerId', 'first_name', 'last_name', 'address', 'city', 'zip', 'phone',
+    'email', 'ssn', 'passport', 'age', 'gender', 'dob', 'nationality'
+]
+INTEGRATION_SNIPPETS = [
+    'restTemplate.get(baseUrl + "/api/customers")',
+    'client.call("https://partner.example.com/v1/lookup")',
+    'SOAPMessage request = factory.createMessage()',
+    'conn = DriverManager.getConnection("jdbc:db2://host/DB")',
+    'producer.send(new ProducerRecord(topic, key, value))',
+    'rows = read_csv(path); write json output'
+]
+PLAIN_LINES = [
+    'int counter = counter + 1',
+    'if (result == null) return',
+    'total += item.getQuantity() * item.getPrice()',
+    'logger.debug("processing batch")',
+    'buffer.clear()'
+]
+BENCH_PASSPHRASE = 'codelens-benchmark'
+# Extension -> (statement template, comment prefix)
+LANGUAGE_TEMPLATES = {
+    '.java': ('        {0};\n', '        // '),
+    '.py': ('    {0}\n', '    # '),
+    '.js': ('  {0};\n', '  // '),
+    '.ts': ('  {0};\n', '  // '),
+    '.cs': ('        {0};\n', '        // '),
+    '.php': ('    {0};\n', '    // '),
+    '.rb': ('  {0}\n', '  # ')
+}
+
+
+def generate_repository(root, files=200, languages=('.java', '.py', '.js'), lines_per_file=300,
+                        hit_density=0.05, seed=0):
+    """Write a synthetic source tree where roughly hit_density of lines contain a hit."""
+    rng = random.Random(seed)
+    for index in range(files):
+        extension = languages[index % len(languages)]
+        statement, comment = LANGUAGE_TEMPLATES[extension]
+        directory = Path(root) / f"module{index % 20}" / f"pkg{index % 7}"
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = []
+        for line_number in range(lines_per_file):
+            roll = rng.random()
+            if roll < hit_density / 2:
+                lines.append(statement.format(f'String v{line_number} = record.get("{rng.choice(DEMOGRAPHIC_WORDS)}")'))
+            elif roll < hit_density:
+                lines.append(statement.format(rng.choice(INTEGRATION_SNIPPETS)))
+            elif roll < hit_density + 0.05:
+                lines.append(f"{comment}step {line_number}\n")
+            else:
+                lines.append(statement.format(rng.choice(PLAIN_LINES)))
+        (directory / f"Source{index}{extension}").write_text(''.join(lines), encoding='utf-8')
+
+
+def generate_encrypted_repository(source, destination, keys):
+    """Encrypt every file under source to destination/<path>.enc; returns the encrypted paths."""
+    from encrypt_decrypt_java import encrypt_stream
+
+    encrypted_files = []
+    for file_path in sorted(Path(source).rglob('*')):
+        if not file_path.is_file():
+            continue
+        target = Path(destination) / f"{file_path.relative_to(source)}.enc"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, 'rb') as plain, open(target, 'wb') as encrypted:
+            encrypt_stream(plain, encrypted, keys)
+        encrypted_files.append(target)
+    return encrypted_files
+
+
+def generate_spreadsheets(directory, rows=500, seed=0):
+    """Write synthetic C360 and metadata spreadsheets; returns their paths."""
+    rng = random.Random(seed)
+    suffixes = ['', '_cd', '_txt', '_nbr', '_dt', '_ind']
+    customer, meta = [], []
+    for index in range(rows):
+        word = rng.choice(DEMOGRAPHIC_WORDS)
+        name = f"{word}{rng.choice(suffixes)}_{index}"
+        customer.append({
+            'attr_name': name,
+            'business_name': name.replace('_', ' ').title(),
+            'attr_description': f"Customer {word} value number {index}"
+        })
+        # Metadata names are perturbed copies so every fuzzy band gets exercised
+        meta_name = name.upper() if rng.random() < 0.3 else name.replace('_', '')
+        meta.append({
+            'attr_name': meta_name,
+            'business_name': meta_name.replace('_', ' '),
+            'attr_description': f"{word} attribute {index} from source system"
+        })
+    customer_path = os.path.join(directory, 'c360.xlsx')
+    meta_path = os.path.join(directory, 'metadata.xlsx')
+    pd.DataFrame(customer).to_excel(customer_path, index=False)
+    pd.DataFrame(meta).to_excel(meta_path, index=False)
+    return customer_path, meta_path
+
+
+def generate_mainframe(root, programs=200, copybooks=40, seed=0):
+    """Write synthetic COBOL programs, copybooks, JCL and SQL members."""
+    rng = random.Random(seed)
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    for index in range(copybooks):
+        entries = [f"       01 CPY{index}-REC.\n"]
+        for field in range(20):
+            entries.append(f"           05 CPY{index}-{rng.choice(DEMOGRAPHIC_WORDS).upper()}-{field} PIC X(20).\n")
+        if index and rng.random() < 0.3:
+            entries.append(f"           COPY CPY{rng.randrange(index)}.\n")
+        (root / f"CPY{index}.cpy").write_text(''.join(entries))
+    for index in range(programs):
+        lines = [
+            "       IDENTIFICATION DIVISION.\n",
+            f"       PROGRAM-ID. PGM{index}.\n",
+            "       DATA DIVISION.\n",
+            "       WORKING-STORAGE SECTION.\n"
+        ]
+        for copybook in rng.sample(range(copybooks), min(3, copybooks)):
+            lines.append(f"           COPY CPY{copybook}.\n")
+        lines.append("       PROCEDURE DIVISION.\n")
+        for step in range(60):
+            roll = rng.random()
+            if roll < 0.05:
+                lines.append(f"           CALL 'PGM{rng.randrange(programs)}' USING WS-AREA.\n")
+            elif roll < 0.10:
+                lines.append(f"           EXEC SQL SELECT NAME INTO :WS-NAME FROM TABLE{rng.randrange(30)} END-EXEC.\n")
+            elif roll < 0.12:
+                lines.append(f"           EXEC CICS LINK PROGRAM('PGM{rng.randrange(programs)}') END-EXEC.\n")
+            elif roll < 0.20:
+                lines.append(f"      * STEP {step} COMMENT CALL 'NOTREAL'\n")
+            else:
+                lines.append(f"           MOVE WS-FIELD-{step} TO WS-OUT-{step}.\n")
+        (root / f"PGM{index}.cbl").write_text(''.join(lines))
+    for index in range(max(1, programs // 10)):
+        steps = ''.join(
+            f"//STEP{step} EXEC PGM=PGM{rng.randrange(programs)}\n" for step in range(5)
+        )
+        (root / f"JOB{index}.jcl").write_text(f"//JOB{index} JOB (ACCT),'BENCH'\n{steps}")
+    for index in range(max(1, programs // 20)):
+        (root / f"QUERY{index}.sql").write_text(
+            f"SELECT * FROM TABLE{index} JOIN TABLE{index + 1} ON A = B;\n"
+            f"INSERT INTO TABLE{index + 2} VALUES (1);\n"
+        )
+
+
+@contextmanager
+def working_directory(path):
+    """Run a block with path as cwd, so generated reports and logs land there"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def measure(function, repeats):
+    """Time function over repeats runs, then trace one extra run for peak memory."""
+    wall, cpu = [], []
+    for _ in range(repeats):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        function()
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+
+    # Traced separately: tracemalloc slows allocation-heavy code considerably
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'repeats': repeats,
+        'wall_s_min': round(min(wall), 4),
+        'wall_s_median': round(statistics.median(wall), 4),
+        'cpu_s_median': round(statistics.median(cpu), 4),
+        'peak_mb': round(peak / 1e6, 2)
+    }
+
+
+def retained_mb(function):
+    """Memory still held after function returns, i.e. by its result; traced over one extra run."""
+    tracemalloc.start()
+    try:
+        kept = function()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return round(current / 1e6, 2)
+
+
+def run_benchmarks(args, workdir):
+    """Generate the synthetic inputs and run every benchmark; returns {name: measurement}."""
+    from codescan import CodeAnalyzer, _analyze_encrypted_file, _init_decryption_worker, plain_results
+    from encrypt_decrypt_java import PassphraseKeys
+    from app import compare_attributes
+    from ibm import MainframeDFDAnalyzer
+
+    repo = os.path.join(workdir, 'repo')
+    mainframe = os.path.join(workdir, 'mainframe')
+    generate_repository(repo, args.files, tuple(args.languages), args.lines, args.hit_density, args.seed)
+    customer_path, meta_path = generate_spreadsheets(workdir, args.rows, args.seed)
+    generate_mainframe(mainframe, args.programs, max(2, args.programs // 5), args.seed)
+
+    results = {}
+    with working_directory(workdir):
+        analyzer = CodeAnalyzer(repo, 'Benchmark')
+        print("⏱  CodeAnalyzer.scan_repository")
+        results['scan_repository'] = measure(analyzer.scan_repository, args.repeats)
+
+        code_files = analyzer.get_code_files()
+        print("⏱  CodeAnalyzer.analyze_file (all files)")
+        results['analyze_file'] = measure(
+            lambda: [analyzer.analyze_file(file_path) for file_path in code_files], args.repeats
+        )
+        results['analyze_file']['files'] = len(code_files)
+
+        # The same sources encrypted, so these compare directly with the plaintext cases above
+        keys = PassphraseKeys(BENCH_PASSPHRASE)
+        encrypted_files = generate_encrypted_repository(repo, os.path.join(workdir, 'encrypted_repo'), keys)
+        encrypted = CodeAnalyzer(os.path.join(workdir, 'encrypted_repo'), 'Benchmark', decryption_key=BENCH_PASSPHRASE)
+        print("⏱  CodeAnalyzer.scan_repository (encrypted)")
+        results['scan_repository_encrypted'] = measure(encrypted.scan_repository, args.repeats)
+
+        # In-process, as one decryption worker would run; the first call pays the key derivation
+        _init_decryption_worker(encrypted)
+        _analyze_encrypted_file(encrypted_files[0])
+        print("⏱  decrypt and analyze .enc files (worker path)")
+        results['analyze_encrypted_file'] = measure(
+            lambda: [_analyze_encrypted_file(file_path) for file_path in encrypted_files], args.repeats
+        )
+        results['analyze_encrypted_file']['files'] = len(encrypted_files)
+
+        blobs = [(file_path, file_path.read_bytes()) for file_path in encrypted_files]
+        print("⏱  CodeAnalyzer.analyze_blob (.enc in memory)")
+        results['analyze_blob_encrypted'] = measure(
+            lambda: [encrypted.analyze_blob(file_path, data, keys) for file_path, data in blobs], args.repeats
+        )
+
+        scan_results = analyzer.scan_repository()
+        # Results kept by the caller: the compact occurrence store, against the plain
+        # per-hit dicts and lists it replaced (strings are shared with the store, so
+        # the plain figure is a lower bound for the old representation)
+        results['scan_repository']['retained_mb'] = retained_mb(analyzer.scan_repository)
+        print("⏱  plain_results (materialized dicts)")
+        results['plain_results'] = measure(lambda: plain_results(scan_results), args.repeats)
+        results['plain_results']['retained_mb'] = retained_mb(lambda: plain_results(scan_results))
+        results['plain_results']['hits'] = (
+            scan_results['summary']['demographic_fields_found'] + scan_results['summary']['integration_patterns_found']
+        )
+        report_path = os.path.join(workdir, 'benchmark_report.html')
+        print("⏱  CodeAnalyzer.generate_html_report")
+        results['generate_html_report'] = measure(
+            lambda: analyzer.generate_html_report(scan_results, report_path), args.repeats
+        )
+
+        df_customer = pd.read_excel(customer_path)
+        df_meta = pd.read_excel(meta_path)
+        for algorithm in ("Levenshtein Ratio (Basic)", "Token Sort Ratio"):
+            name = f"compare_attributes[{algorithm}]"
+            print(f"⏱  {name}")
+            results[name] = measure(
+                lambda: compare_attributes(df_customer, df_meta, algorithm, 70, "Attribute Name"), args.repeats
+            )
+
+        print("⏱  MainframeDFDAnalyzer.analyze_project (cold)")
+        results['analyze_project_cold'] = measure(
+            lambda: MainframeDFDAnalyzer(mainframe).analyze_project(), args.repeats
+        )
+
+        cache_file = os.path.join(workdir, 'dfd_cache.json')
+        MainframeDFDAnalyzer(mainframe, cache_file=cache_file).analyze_project()
+        print("⏱  MainframeDFDAnalyzer.analyze_project (warm cache)")
+        results['analyze_project_warm'] = measure(
+            lambda: MainframeDFDAnalyzer(mainframe, cache_file=cache_file).analyze_project(), args.repeats
+        )
+    return results
+
+
+def git_revision():
+    """Current commit of the checkout, if this is a git repository"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    """Print wall-time and memory ratios against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nComparison with {baseline_path} (commit {baseline.get('commit')}):")
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f"  {name:48s} (new)")
+            continue
+        time_ratio = result['wall_s_median'] / before['wall_s_median'] if before['wall_s_median'] else float('inf')
+        memory_ratio = result['peak_mb'] / before['peak_mb'] if before['peak_mb'] else float('inf')
+        print(f"  {name:48s} time x{time_ratio:.2f}  memory x{memory_ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CodeLens scanner, reports and matchers.")
+    parser.add_argument('--files', type=int, default=200, help="synthetic source files")
+    parser.add_argument('--lines', type=int, default=300, help="lines per source file")
+    parser.add_argument('--languages', nargs='+', default=['.java', '.py', '.js'],
+                        choices=sorted(LANGUAGE_TEMPLATES), help="source file extensions")
+    parser.add_argument('--hit-density', type=float, default=0.05, help="fraction of lines with a hit")
+    parser.add_argument('--rows', type=int, default=500, help="spreadsheet rows")
+    parser.add_argument('--programs', type=int, default=200, help="COBOL programs")
+    parser.add_argument('--repeats', type=int, default=3, help="timed runs per benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    # Per-file INFO logging would dominate the console; its cost is not what is measured here
+    logging.disable(logging.INFO)
+    workdir = tempfile.mkdtemp(prefix='codelens_bench_')
+    try:
+        results = run_benchmarks(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'commit': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for name, result in results.items():
+        retained = f"  retained {result['retained_mb']:.2f} MB" if 'retained_mb' in result else ''
+        print(f"  {name:48s} {result['wall_s_median']:8.3f}s  {result['peak_mb']:8.2f} MB{retained}")
+    print(f"✅ Results written to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,69 @@
 import os  
 import re  
 import json  
+import io
 from typing import Dict, List, Set  
 from pathlib import Path  
 import logging  
+import time
+import heapq
+import cProfile
+from array import array
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass  
 from datetime import datetime  
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pattern_packs import PatternMatcher, load_pack, merge_packs
+from source_masking import mask_noise, split_like
+from identifier_index import index_identifiers
+from archive_sources import is_archive, iter_archive, iter_sources
+from git_delta import changed_files, diff_file_results, read_blobs, resolve_commit, BASE_STATUSES, HEAD_STATUSES
+
+# Demographic data patterns, shared with the mainframe copybook lineage scan in ibm.py
+DEMOGRAPHIC_PATTERNS = {
+    'id': r'\b(customerId|cm_15)\b',
+    'name': r'\b(first_name|last_name|full_name|name|amount)\b',
+    'address': r'\b(address|street|city|state|zip|postal_code)\b',
+    'contact': r'\b(phone|email|contact)\b',
+    'identity': r'\b(ssn|social_security|tax_id|passport)\b',
+    'demographics': r'\b(age|gender|dob|date_of_birth|nationality|ethnicity)\b'
+}
+
+# Lines longer than this (typically minified code) are matched in bounded, overlapping
+# windows so greedy patterns such as http_methods cannot stall on a multi-megabyte line
+MAX_LINE_LENGTH = 4096
+LINE_WINDOW_OVERLAP = 256
+# Characters of an oversized line kept as the snippet around a hit
+SNIPPET_LIMIT = 200
+# Written to the HTML report in place of code from decrypted '.enc' sources
+REDACTED_SNIPPET = '[encrypted source: code not written to the report]'
+
+# Heuristics for minified or generated files, which are flagged and optionally skipped
+GENERATED_NAME_MARKERS = ('.min.', '-min.', '.bundle.', '.generated.', '_pb2.')
+GENERATED_HEADER_MARKERS = ('@generated', 'do not edit', 'auto-generated', 'autogenerated', 'code generated')
+GENERATED_HEADER_LINES = 5
+MINIFIED_AVG_LINE_LENGTH = 300
+
+def bounded_finditer(compiled: re.Pattern, line: str):
+    """compiled.finditer over a long line, one MAX_LINE_LENGTH window at a time"""
+    for start in range(0, len(line), MAX_LINE_LENGTH):
+        end = start + MAX_LINE_LENGTH
+        # pos/endpos keep \b context at the window start; the overlap lets matches cross the end
+        for match in compiled.finditer(line, start, min(len(line), end + LINE_WINDOW_OVERLAP)):
+            if match.start() >= end:
+                break
+            yield match
+
+def bounded_search(compiled: re.Pattern, line: str):
+    """compiled.search over a long line, one MAX_LINE_LENGTH window at a time"""
+    return next(bounded_finditer(compiled, line), None)
+
+def snippet_around(line: str, position: int) -> str:
+    """Keep SNIPPET_LIMIT characters around a hit instead of the whole oversized line"""
+    start = max(0, position - SNIPPET_LIMIT // 2)
+    return line[start:start + SNIPPET_LIMIT].strip()
 
 @dataclass  
 class IntegrationPattern:  
@@ -21,21 +79,298 @@ class DemographicData:
     data_type: str  
     occurrences: List[Dict]  
 
+class OccurrenceStore:
+    """
+    Column storage for scan hits. File paths, field names, pattern types and
+    snippets live once in a string table; each hit is one row of integer ids
+    in typed arrays. demographic_data and integration_patterns expose the
+    familiar dict-shaped results as read-only views over the columns; use
+    plain_results for a JSON-serializable copy.
+    """
+    DEMOGRAPHIC = 0
+    INTEGRATION = 1
+
+    def __init__(self):
+        self.strings = []
+        self._string_ids = {}
+        self.kind = array('B')
+        self.file = array('I')
+        self.category = array('I')   # data type or pattern type
+        self.name = array('I')       # field name or sub type
+        self.line = array('I')
+        self.snippet = array('I')
+        self.context = array('i')    # context window index, -1 when not captured
+        # file id -> field name id -> demographic row ids, in insertion order
+        self._demographic_rows = {}
+        self._integration_rows = array('I')
+        self.demographic_data = _DemographicView(self)
+        self.integration_patterns = _RowsView(self, self._integration_rows)
+
+    def intern(self, text: str) -> int:
+        """Return the string table id for text, adding it on first use"""
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def _append(self, kind: int, file_path: str, category: str, name: str, occurrence: Dict) -> int:
+        row = len(self.kind)
+        self.kind.append(kind)
+        self.file.append(self.intern(file_path))
+        self.category.append(self.intern(category))
+        self.name.append(self.intern(name))
+        self.line.append(occurrence['line_number'])
+        self.snippet.append(self.intern(occurrence['code_snippet']))
+        self.context.append(occurrence.get('context_id', -1))
+        return row
+
+    def add_file_results(self, file_results: Dict):
+        """Move one file's dict-shaped results from analyze_file into the columns"""
+        for file_path, fields in file_results['demographic_data'].items():
+            file_fields = self._demographic_rows.setdefault(self.intern(file_path), {})
+            for field_name, data in fields.items():
+                rows = file_fields.setdefault(self.intern(field_name), array('I'))
+                for occurrence in data['occurrences']:
+                    rows.append(self._append(self.DEMOGRAPHIC, file_path, data['data_type'], field_name, occurrence))
+        for pattern in file_results['integration_patterns']:
+            self._integration_rows.append(self._append(
+                self.INTEGRATION, pattern['file_path'], pattern['pattern_type'], pattern['sub_type'], pattern
+            ))
+
+    def record(self, row: int) -> Dict:
+        """Build the dict for one row, shaped like analyze_file's output"""
+        strings = self.strings
+        if self.kind[row] == self.DEMOGRAPHIC:
+            record = {
+                'line_number': self.line[row],
+                'code_snippet': strings[self.snippet[row]]
+            }
+        else:
+            record = {
+                'pattern_type': strings[self.category[row]],
+                'sub_type': strings[self.name[row]],
+                'file_path': strings[self.file[row]],
+                'line_number': self.line[row],
+                'code_snippet': strings[self.snippet[row]]
+            }
+        if self.context[row] >= 0:
+            record['context_id'] = self.context[row]
+        return record
+
+    def materialize(self) -> Dict:
+        """Copy the views into plain dicts and lists, e.g. for serialization"""
+        return {
+            'demographic_data': {
+                file_path: {
+                    field_name: {'data_type': data['data_type'], 'occurrences': list(data['occurrences'])}
+                    for field_name, data in fields.items()
+                }
+                for file_path, fields in self.demographic_data.items()
+            },
+            'integration_patterns': list(self.integration_patterns)
+        }
+
+def plain_results(results: Dict) -> Dict:
+    """
+    Copy of scan results with the store views materialized, e.g. for JSON
+    export; the results themselves keep the compact store
+    """
+    plain = {key: value for key, value in results.items() if key != 'occurrence_store'}
+    store = results.get('occurrence_store')
+    if store is not None:
+        plain.update(store.materialize())
+    return plain
+
+class _RowsView(Sequence):
+    """Read-only list of occurrence dicts built on access from store rows"""
+    __slots__ = ('_store', '_rows')
+
+    def __init__(self, store: OccurrenceStore, rows: array):
+        self._store = store
+        self._rows = rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._store.record(row) for row in self._rows[index]]
+        return self._store.record(self._rows[index])
+
+    def __len__(self):
+        return len(self._rows)
+
+class _FieldsView(Mapping):
+    """field name -> {'data_type', 'occurrences'} for one file"""
+    __slots__ = ('_store', '_fields')
+
+    def __init__(self, store: OccurrenceStore, fields: Dict):
+        self._store = store
+        self._fields = fields
+
+    def __getitem__(self, field_name):
+        rows = self._fields.get(self._store._string_ids.get(field_name))
+        if rows is None:
+            raise KeyError(field_name)
+        return {
+            'data_type': self._store.strings[self._store.category[rows[0]]],
+            'occurrences': _RowsView(self._store, rows)
+        }
+
+    def __iter__(self):
+        return (self._store.strings[name_id] for name_id in self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+class _DemographicView(Mapping):
+    """file path -> field name -> {'data_type', 'occurrences'}"""
+    __slots__ = ('_store',)
+
+    def __init__(self, store: OccurrenceStore):
+        self._store = store
+
+    def __getitem__(self, file_path):
+        fields = self._store._demographic_rows.get(self._store._string_ids.get(file_path))
+        if fields is None:
+            raise KeyError(file_path)
+        return _FieldsView(self._store, fields)
+
+    def __iter__(self):
+        return (self._store.strings[file_id] for file_id in self._store._demographic_rows)
+
+    def __len__(self):
+        return len(self._store._demographic_rows)
+
+class ScanMetrics:
+    """
+    Instrumentation for one scan: per-phase wall and CPU time, per-pattern
+    match time and hit counts, and the slowest files.
+    """
+    def __init__(self, slowest_files: int = 10):
+        self.phases = {}
+        self.patterns = {}
+        self.slowest_files = slowest_files
+        self._file_heap = []
+
+    @contextmanager
+    def phase(self, name: str):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def add_phase(self, name: str, wall: float, cpu: float):
+        totals = self.phases.setdefault(name, [0.0, 0.0])
+        totals[0] += wall
+        totals[1] += cpu
+
+    def add_file(self, file_path: Path, timings: Dict):
+        """Fold the per-file 'timings' produced by analyze_content into the totals"""
+        file_seconds = 0.0
+        for phase in ('read', 'match'):
+            wall, cpu = timings[phase]
+            self.add_phase(phase, wall, cpu)
+            file_seconds += wall
+        for key, (seconds, matches) in timings['patterns'].items():
+            totals = self.patterns.setdefault(key, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += matches
+
+        entry = (file_seconds, str(file_path))
+        if len(self._file_heap) < self.slowest_files:
+            heapq.heappush(self._file_heap, entry)
+        else:
+            heapq.heappushpop(self._file_heap, entry)
+
+    def as_dict(self) -> Dict:
+        return {
+            'phases': {
+                name: {'wall_s': round(wall, 4), 'cpu_s': round(cpu, 4)}
+                for name, (wall, cpu) in self.phases.items()
+            },
+            'patterns': [
+                {'pattern': key, 'seconds': round(seconds, 4), 'matches': matches}
+                for key, (seconds, matches) in sorted(self.patterns.items(), key=lambda item: -item[1][0])
+            ],
+            'slowest_files': [
+                {'file_path': file_path, 'seconds': round(seconds, 4)}
+                for seconds, file_path in sorted(self._file_heap, reverse=True)
+            ]
+        }
+
+# Per-process state for decrypting workers, set by _init_decryption_worker
+_worker_analyzer = None
+_worker_keys = None
+
+def _init_decryption_worker(analyzer: 'CodeAnalyzer'):
+    """Give each worker process its own analyzer copy and derived-key cache"""
+    global _worker_analyzer, _worker_keys
+    from encrypt_decrypt_java import PassphraseKeys
+    _worker_analyzer = analyzer
+    _worker_keys = PassphraseKeys(analyzer.decryption_key)
+
+def _analyze_encrypted_file(file_path: Path) -> Dict:
+    """Decrypt one encrypted source in memory and run the pattern matcher on it"""
+    try:
+        return analyze_encrypted_content(_worker_analyzer, _worker_keys, file_path)
+    except Exception as e:
+        # Raised in a worker this would abort executor.map, and with it the whole scan
+        _worker_analyzer.logger.error(f"Error analyzing file {file_path}: {str(e)}")
+        return {'demographic_data': {}, 'integration_patterns': [], 'error': str(e)}
+
+def analyze_encrypted_content(analyzer: 'CodeAnalyzer', keys, file_path: Path) -> Dict:
+    """Decrypt file_path with keys (a PassphraseKeys cache) and analyze it with analyzer"""
+    from encrypt_decrypt_java import decrypt_bytes
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        content = decrypt_bytes(str(file_path), keys).decode('utf-8').splitlines(keepends=True)
+    except Exception as e:
+        analyzer.logger.error(f"Error decrypting file {file_path}: {str(e)}")
+        return {'demographic_data': {}, 'integration_patterns': [], 'error': str(e)}
+    read_time = (time.perf_counter() - wall, time.process_time() - cpu)
+    results = analyzer.analyze_content(file_path, content)
+    if 'timings' in results:
+        results['timings']['read'] = read_time
+    return results
+
 class CodeAnalyzer:  
-    def __init__(self, repo_path: str, app_name: str):  
+    def __init__(self, repo_path: str, app_name: str, decryption_key: str = None, context_lines: int = 0,
+                 instrument: bool = False, profile_output: str = None, skip_generated: bool = False,
+                 pattern_packs: List[str] = None, language_aware: bool = False, identifier_mode: bool = False,
+                 base_ref: str = None, head_ref: str = 'HEAD', sources: List = None, matchers: Dict = None,
+                 report_encrypted_snippets: bool = False):
         self.repo_path = Path(repo_path)
         self.app_name = app_name
+        # Blank out comments and long prose strings before matching (see source_masking.py)
+        self.language_aware = language_aware
+        # Match Python/Java files by their parsed identifiers and literals (see identifier_index.py)
+        self.identifier_mode = identifier_mode
+        # When base_ref is set, only files changed between base_ref and head_ref are
+        # scanned, read from git objects, and results['delta'] lists what changed
+        self.base_ref = base_ref
+        self.head_ref = head_ref
+        # [(name, bytes or binary file object)] scanned from memory instead of repo_path;
+        # archives among them are read member by member. repo_path is then only a label.
+        # A repo_path that is itself a zip/tar archive is scanned the same way.
+        self.sources = sources
+        # Minified/generated files are always flagged; this also leaves them unscanned
+        self.skip_generated = skip_generated
+        # Collect per-phase/per-pattern timings into metadata['performance']
+        self.instrument = instrument
+        # When set, the whole scan runs under cProfile and the stats are dumped here
+        self.profile_output = profile_output
+        self.metrics = None
+        # Lines of context captured before and after each hit; 0 keeps only the hit line
+        self.context_lines = context_lines
+        # When set, '<name>.<ext>.enc' sources are decrypted in memory and scanned too
+        self.decryption_key = decryption_key
+        # Their plaintext stays in memory (results, context windows); the HTML report on
+        # disk shows REDACTED_SNIPPET for their code unless this is explicitly set
+        self.report_encrypted_snippets = report_encrypted_snippets
         self.setup_logging()  
 
-        # Define demographic data patterns  
-        self.demographic_patterns = {  
-            'id': r'\b(customerId|cm_15)\b',
-            'name': r'\b(first_name|last_name|full_name|name|amount)\b', 
-            'address': r'\b(address|street|city|state|zip|postal_code)\b',  
-            'contact': r'\b(phone|email|contact)\b',  
-            'identity': r'\b(ssn|social_security|tax_id|passport)\b',  
-            'demographics': r'\b(age|gender|dob|date_of_birth|nationality|ethnicity)\b'  
-        }  
+        # Define demographic data patterns
+        self.demographic_patterns = dict(DEMOGRAPHIC_PATTERNS)
 
         self.integration_patterns = {
             'rest_api': {
@@ -65,6 +400,13 @@ class CodeAnalyzer:
             }
         }
 
+        # YAML/JSON packs layered over the built-in patterns (see pattern_packs.py);
+        # entries may be paths or packs already returned by load_pack
+        self.pattern_packs = [pack if isinstance(pack, dict) else load_pack(pack) for pack in pattern_packs or []]
+        # extension -> PatternMatcher, compiled on first use; analyzers with the
+        # same packs can pass in one shared dict
+        self._matchers = {} if matchers is None else matchers
+
         # Supported file extensions
         self.supported_extensions = {  
             '.py': 'Python',  
@@ -92,36 +434,96 @@ class CodeAnalyzer:
         """  
         Main method to scan the repository and analyze code  
         """  
-        results = {
+        results = self.new_results()
+
+        self.metrics = ScanMetrics() if self.instrument else None
+        profiler = cProfile.Profile() if self.profile_output else None
+        if profiler:
+            profiler.enable()
+
+        try:  
+            with self._phase('total'):
+                if self.base_ref is not None:
+                    self.scan_git_delta(results)
+                elif self.sources is not None or (is_archive(self.repo_path.name) and self.repo_path.is_file()):
+                    self.scan_sources(results)
+                else:
+                    with self._phase('walk'):
+                        code_files = self.get_code_files()
+                    encrypted_files = [f for f in code_files if f.suffix == '.enc']
+
+                    for file_path in code_files:  
+                        if file_path.suffix == '.enc':
+                            continue
+                        self.logger.info(f"Analyzing file: {file_path}")  
+                        file_results = self.analyze_file(file_path)  
+                        with self._phase('aggregate'):
+                            self.update_results(results, file_results, file_path)  
+                        results['summary']['files_analyzed'] += 1  
+
+                    for file_path, file_results in self.analyze_encrypted_files(encrypted_files):
+                        self.logger.info(f"Analyzed encrypted file: {file_path}")
+                        with self._phase('aggregate'):
+                            self.update_results(results, file_results, file_path)
+                        results['summary']['files_analyzed'] += 1
+
+                if self.metrics is not None:
+                    results['metadata']['performance'] = self.metrics.as_dict()
+                    self.log_pattern_costs(results['metadata']['performance'])
+                with self._phase('report'):
+                    self.generate_report(results)  
+
+            if self.metrics is not None:
+                results['metadata']['performance'] = self.metrics.as_dict()
+            return results  
+
+        except Exception as e:  
+            self.logger.error(f"Error during repository scan: {str(e)}")  
+            raise  
+
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(self.profile_output)
+                results['metadata']['profile_output'] = self.profile_output
+                self.logger.info(f"Profile written to {self.profile_output}")
+
+    def new_results(self) -> Dict:
+        """Empty results for this application, filled in by update_results"""
+        store = OccurrenceStore()
+        return {
             'metadata': {
                 'application_name': self.app_name,
                 'scan_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'repository_path': str(self.repo_path)
             },
-            'demographic_data': {},
-            'integration_patterns': [],
+            # Read-only views over the compact store; plain_results() gives plain dicts
+            'occurrence_store': store,
+            'demographic_data': store.demographic_data,
+            'integration_patterns': store.integration_patterns,
+            'context_windows': {},
+            'fingerprints': {},
             'summary': {
                 'files_analyzed': 0,
                 'unique_demographic_fields': set(),
                 'demographic_fields_found': 0,
                 'integration_patterns_found': 0,
-                'file_details': []
+                'file_details': [],
+                'generated_files': [],
+                'oversized_lines': 0
             }  
-        }  
-
-        try:  
-            for file_path in self.get_code_files():  
-                self.logger.info(f"Analyzing file: {file_path}")  
-                file_results = self.analyze_file(file_path)  
-                self.update_results(results, file_results, file_path)  
-                results['summary']['files_analyzed'] += 1  
+        }
 
-            self.generate_report(results)  
-            return results  
+    def log_pattern_costs(self, performance: Dict, top: int = 5):
+        """Log the patterns that took the most match time"""
+        for cost in performance['patterns'][:top]:
+            self.logger.info(
+                f"Pattern cost: {cost['pattern']} {cost['seconds']:.3f}s for {cost['matches']} matches"
+            )
 
-        except Exception as e:  
-            self.logger.error(f"Error during repository scan: {str(e)}")  
-            raise  
+    def _phase(self, name: str):
+        """Time a scan phase when instrumentation is on; a no-op context otherwise"""
+        return self.metrics.phase(name) if self.metrics is not None else nullcontext()
 
     def get_code_files(self) -> List[Path]:  
         """  
@@ -129,6 +531,15 @@ class CodeAnalyzer:
         Returns a list of Path objects for all non-test code files.
         """  
         code_files = []  
+        for root, _, files in os.walk(self.repo_path):  
+            for file in files:  
+                file_path = Path(root) / file
+                if self.is_code_file(file_path):
+                    code_files.append(file_path)  
+        return code_files
+
+    def is_code_file(self, file_path: Path) -> bool:
+        """Check for a supported (or supported encrypted) source that is not a test file"""
         # Define patterns that identify test files
         test_patterns = [
             'test_',        # Files starting with test_
@@ -136,39 +547,225 @@ class CodeAnalyzer:
             '/tests/',     # Files in a tests directory
             '/test/'       # Files in a test directory
         ]
+        # Check if the file path contains any test patterns
+        if any(pattern in str(file_path).lower() for pattern in test_patterns):
+            self.logger.info(f"Skipping test file: {file_path}")
+            return False
 
-        for root, _, files in os.walk(self.repo_path):  
-            for file in files:  
-                file_path = Path(root) / file
-                # Check if the file path contains any test patterns
-                if any(pattern in str(file_path).lower() for pattern in test_patterns):
-                    self.logger.info(f"Skipping test file: {file_path}")
-                    continue
+        # Only include files with supported extensions
+        return file_path.suffix in self.supported_extensions or self.is_supported_encrypted_file(file_path)
 
-                # Only include files with supported extensions
-                if file_path.suffix in self.supported_extensions:  
-                    code_files.append(file_path)  
-        return code_files
+    def is_supported_encrypted_file(self, file_path: Path) -> bool:
+        """Check for an encrypted source such as Foo.java.enc when a decryption key is set"""
+        return (
+            self.decryption_key is not None
+            and file_path.suffix == '.enc'
+            and Path(file_path.stem).suffix in self.supported_extensions
+        )
+
+    def analyze_encrypted_files(self, file_paths: List[Path]):
+        """
+        Decrypt and analyze encrypted sources in worker processes.
+        Plaintext only ever exists in worker memory; yields (file_path, results).
+        """
+        if not file_paths:
+            return
+        done = 0
+        try:
+            with ProcessPoolExecutor(initializer=_init_decryption_worker, initargs=(self,)) as executor:
+                for file_results in executor.map(_analyze_encrypted_file, file_paths, chunksize=16):
+                    yield file_paths[done], file_results
+                    done += 1
+        except (BrokenProcessPool, OSError) as e:
+            self.logger.error(f"Decryption workers failed ({str(e)}); decrypting in-process")
+            _init_decryption_worker(self)
+            for file_path in file_paths[done:]:
+                yield file_path, _analyze_encrypted_file(file_path)
+
+    def scan_git_delta(self, results: Dict):
+        """
+        Scan the files changed between base_ref and head_ref. Results describe
+        the head versions; results['delta'] lists occurrences added and removed.
+        """
+        with self._phase('walk'):
+            base = resolve_commit(self.repo_path, self.base_ref)
+            head = resolve_commit(self.repo_path, self.head_ref)
+            changes = [
+                (status, base_path, head_path)
+                for status, base_path, head_path in changed_files(self.repo_path, base, head)
+                if self.is_code_file(self.repo_path / head_path)
+            ]
+            specs = [f"{base}:{path}" for status, path, _ in changes if status in BASE_STATUSES]
+            specs += [f"{head}:{path}" for status, _, path in changes if status in HEAD_STATUSES]
+            blobs = read_blobs(self.repo_path, specs)
+
+        delta = {
+            'base_ref': self.base_ref,
+            'head_ref': self.head_ref,
+            'base_commit': base,
+            'head_commit': head,
+            'files': [],
+            'demographic_added': [],
+            'demographic_removed': [],
+            'integration_added': [],
+            'integration_removed': []
+        }
+        keys = None
+        if self.decryption_key is not None:
+            from encrypt_decrypt_java import PassphraseKeys
+            keys = PassphraseKeys(self.decryption_key)
+        empty = {'demographic_data': {}, 'integration_patterns': []}
+        for status, base_path, head_path in changes:
+            file_path = self.repo_path / head_path
+            self.logger.info(f"Analyzing changed file ({status}): {file_path}")
+            base_results = head_results = empty
+            if status in BASE_STATUSES:
+                base_results = self.analyze_blob(file_path, blobs.get(f"{base}:{base_path}"), keys)
+            if status in HEAD_STATUSES:
+                head_results = self.analyze_blob(file_path, blobs.get(f"{head}:{head_path}"), keys)
+                with self._phase('aggregate'):
+                    self.update_results(results, head_results, file_path)
+                results['summary']['files_analyzed'] += 1
+
+            delta['files'].append({
+                'file_path': str(file_path),
+                'status': status,
+                'previous_path': str(self.repo_path / base_path) if base_path != head_path else None
+            })
+            for kind, entries in diff_file_results(str(file_path), base_results, head_results).items():
+                delta[kind].extend(entries)
+
+        results['delta'] = delta
+        results['metadata']['git_range'] = f"{self.base_ref}..{self.head_ref}"
+
+    def scan_sources(self, results: Dict):
+        """Scan in-memory sources, or the archive at repo_path, without extracting anything to disk"""
+        keys = None
+        if self.decryption_key is not None:
+            from encrypt_decrypt_java import PassphraseKeys
+            keys = PassphraseKeys(self.decryption_key)
+
+        def wanted(name: str) -> bool:
+            return self.is_code_file(self.repo_path / name)
+
+        # Members of an archive repo_path are named relative to the archive itself
+        with open(self.repo_path, 'rb') if self.sources is None else nullcontext() as archive:
+            if archive is None:
+                members = iter_sources(self.sources, wanted)
+            else:
+                members = iter_archive(archive, self.repo_path.name, wanted)
+            for name, content in members:
+                file_path = self.repo_path / name
+                self.logger.info(f"Analyzing file: {file_path}")
+                file_results = self.analyze_blob(file_path, content, keys)
+                with self._phase('aggregate'):
+                    self.update_results(results, file_results, file_path)
+                results['summary']['files_analyzed'] += 1
+
+    def analyze_blob(self, file_path: Path, data: bytes, keys=None) -> Dict:
+        """Analyze a file version held in memory; .enc sources are decrypted with keys (PassphraseKeys)"""
+        if data is None:
+            return {'demographic_data': {}, 'integration_patterns': []}
+        try:
+            if file_path.suffix == '.enc':
+                from encrypt_decrypt_java import decrypt_fileobj
+                data = decrypt_fileobj(io.BytesIO(data), keys)
+            content = io.StringIO(data.decode('utf-8'), newline=None).readlines()
+        except Exception as e:
+            self.logger.error(f"Error analyzing file {file_path}: {str(e)}")
+            return {'demographic_data': {}, 'integration_patterns': [], 'error': str(e)}
+        return self.analyze_content(file_path, content)
 
     def analyze_file(self, file_path: Path) -> Dict:  
         """  
         Analyze a single file for demographic data and integration patterns  
         """  
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:  
+            with open(file_path, 'r', encoding='utf-8') as f:  
+                content = f.readlines()  
+        except Exception as e:
+            self.logger.error(f"Error analyzing file {file_path}: {str(e)}")
+            # 'error' lets callers such as portfolio scans list the file as failed
+            return {'demographic_data': {}, 'integration_patterns': [], 'error': str(e)}
+        read_time = (time.perf_counter() - wall, time.process_time() - cpu)
+
+        results = self.analyze_content(file_path, content)
+        if 'timings' in results:
+            results['timings']['read'] = read_time
+        return results
+
+    def analyze_content(self, file_path: Path, content: List[str]) -> Dict:
+        """
+        Match demographic and integration patterns against the lines of a file
+        """
         results = {  
             'demographic_data': {},  
-            'integration_patterns': []  
+            'integration_patterns': [],
+            'context_windows': {},
+            'oversized_lines': 0
         }  
 
+        generated = self.generated_reason(file_path, content)
+        if generated:
+            results['generated'] = generated
+            if self.skip_generated:
+                self.logger.info(f"Skipping {generated} file: {file_path}")
+                return results
+
+        matcher = self.matcher_for(file_path)
+        text = ''.join(content)
+        language = self.supported_extensions.get(self._source_extension(file_path))
+        scan_lines = content
+        identifiers = None
+        if not matcher.may_match(text):
+            # Fast path: no pattern can match any line, so the line loop (and masking) is skipped
+            scan_lines = []
+        elif self.identifier_mode:
+            identifiers = index_identifiers(text, language)
+            if identifiers is not None:
+                scan_lines = []
+        if scan_lines and self.language_aware:
+            scan_lines = split_like(mask_noise(text, language), content)
+        if not scan_lines:
+            results['oversized_lines'] = sum(1 for line in content if len(line) > MAX_LINE_LENGTH)
+
+        # Per-pattern timing costs a perf_counter() pair per pattern and line, so it is opt-in
+        instrument = self.instrument
+        if instrument:
+            pattern_seconds = {}
+            wall, cpu = time.perf_counter(), time.process_time()
+
         try:  
-            with open(file_path, 'r', encoding='utf-8') as f:  
-                content = f.readlines()  
+            # Match against scan_lines (masked when language-aware); snippets come from content
+            for line_num, line in enumerate(scan_lines, 1):  
+                oversized = len(line) > MAX_LINE_LENGTH
+                if oversized:
+                    results['oversized_lines'] += 1
+
+                # Large literal field dictionaries are matched in one keyword pass per line
+                keyword_spans = None
+                if matcher.keywords is not None:
+                    if instrument:
+                        started = time.perf_counter()
+                    keyword_spans = matcher.keywords.find(line)
+                    if instrument:
+                        pattern_seconds['demographic.keywords'] = (
+                            pattern_seconds.get('demographic.keywords', 0.0) + time.perf_counter() - started
+                        )
 
-            for line_num, line in enumerate(content, 1):  
                 # Check for demographic data  
-                for data_type, pattern in self.demographic_patterns.items():  
-                    matches = re.finditer(pattern, line, re.IGNORECASE)  
-                    for match in matches:  
-                        field_name = match.group(0)  
+                for data_type, pattern, keyword_slot in matcher.demographic:  
+                    if instrument:
+                        started = time.perf_counter()
+                    if keyword_slot is not None and keyword_spans is not None:
+                        spans = keyword_spans.get(keyword_slot, ())
+                    elif oversized:
+                        spans = (match.span() for match in bounded_finditer(pattern, line))
+                    else:
+                        spans = (match.span() for match in pattern.finditer(line))
+                    for start, end in spans:  
+                        field_name = line[start:end]  
                         if str(file_path) not in results['demographic_data']:  
                             results['demographic_data'][str(file_path)] = {}  
                         if field_name not in results['demographic_data'][str(file_path)]:  
@@ -178,33 +775,213 @@ class CodeAnalyzer:
                             }  
                         results['demographic_data'][str(file_path)][field_name]['occurrences'].append({  
                             'line_number': line_num,  
-                            'code_snippet': line.strip()  
+                            'code_snippet': (
+                                snippet_around(content[line_num - 1], start) if oversized
+                                else content[line_num - 1].strip()
+                            )
                         })  
+                    if instrument:
+                        key = f"demographic.{data_type}"
+                        pattern_seconds[key] = pattern_seconds.get(key, 0.0) + time.perf_counter() - started
 
                 # Check for integration patterns  
-                for pattern_category, sub_patterns in self.integration_patterns.items():
-                    for sub_type, pattern in sub_patterns.items():
-                        if re.search(pattern, line, re.IGNORECASE):
-                            results['integration_patterns'].append({
-                                'pattern_type': pattern_category,
-                                'sub_type': sub_type,
-                                'file_path': str(file_path),
-                                'line_number': line_num,
-                                'code_snippet': line.strip()
-                            })
+                for pattern_category, sub_type, pattern in matcher.integration:
+                    if instrument:
+                        started = time.perf_counter()
+                    if oversized:
+                        match = bounded_search(pattern, line)
+                    else:
+                        match = pattern.search(line)
+                    if match:
+                        results['integration_patterns'].append({
+                            'pattern_type': pattern_category,
+                            'sub_type': sub_type,
+                            'file_path': str(file_path),
+                            'line_number': line_num,
+                            'code_snippet': (
+                                snippet_around(content[line_num - 1], match.start()) if oversized
+                                else content[line_num - 1].strip()
+                            )
+                        })
+                    if instrument:
+                        key = f"{pattern_category}.{sub_type}"
+                        pattern_seconds[key] = pattern_seconds.get(key, 0.0) + time.perf_counter() - started
+
+            if identifiers is not None:
+                self.match_identifiers(
+                    file_path, content, identifiers, matcher, results, pattern_seconds if instrument else None
+                )
+
+            if matcher.fingerprints:
+                results['fingerprints'] = [
+                    name for name, pattern in matcher.fingerprints if pattern.search(text)
+                ]
+
+            if self.context_lines > 0:
+                windows = self.capture_context(file_path, content, results)
+                if windows:
+                    results['context_windows'][str(file_path)] = windows
 
         except Exception as e:  
             self.logger.error(f"Error analyzing file {file_path}: {str(e)}")  
 
+        if instrument:
+            results['timings'] = {
+                'read': (0.0, 0.0),
+                'match': (time.perf_counter() - wall, time.process_time() - cpu),
+                'patterns': self._pattern_timings(results, pattern_seconds)
+            }
         return results  
 
+    def match_identifiers(self, file_path: Path, content: List[str], identifiers: Dict[str, List[int]],
+                          matcher: PatternMatcher, results: Dict, pattern_seconds: Dict = None):
+        """
+        Match demographic and integration patterns once per distinct identifier
+        or literal, then record a hit on every line it appears on; per-pattern
+        match time is added to pattern_seconds when given
+        """
+        instrument = pattern_seconds is not None
+        demographic_hits = []
+        integration_hits = set()
+        for name, line_numbers in identifiers.items():
+            bounded = len(name) > MAX_LINE_LENGTH
+            if instrument:
+                started = time.perf_counter()
+            keyword_spans = matcher.keywords.find(name) if matcher.keywords is not None else None
+            if instrument:
+                pattern_seconds['demographic.keywords'] = (
+                    pattern_seconds.get('demographic.keywords', 0.0) + time.perf_counter() - started
+                )
+            for data_type, pattern, keyword_slot in matcher.demographic:
+                if instrument:
+                    started = time.perf_counter()
+                if keyword_slot is not None and keyword_spans is not None:
+                    spans = keyword_spans.get(keyword_slot, ())
+                else:
+                    matches = bounded_finditer(pattern, name) if bounded else pattern.finditer(name)
+                    spans = [match.span() for match in matches]
+                for start, end in spans:
+                    demographic_hits.extend(
+                        (line_num, name[start:end], data_type) for line_num in line_numbers
+                    )
+                if instrument:
+                    key = f"demographic.{data_type}"
+                    pattern_seconds[key] = pattern_seconds.get(key, 0.0) + time.perf_counter() - started
+            for order, (pattern_category, sub_type, pattern) in enumerate(matcher.integration):
+                if instrument:
+                    started = time.perf_counter()
+                match = bounded_search(pattern, name) if bounded else pattern.search(name)
+                if match:
+                    integration_hits.update(
+                        (line_num, order, pattern_category, sub_type) for line_num in line_numbers
+                    )
+                if instrument:
+                    key = f"{pattern_category}.{sub_type}"
+                    pattern_seconds[key] = pattern_seconds.get(key, 0.0) + time.perf_counter() - started
+
+        file_fields = results['demographic_data'].setdefault(str(file_path), {}) if demographic_hits else None
+        for line_num, field_name, data_type in sorted(demographic_hits, key=lambda hit: hit[0]):
+            line = content[line_num - 1]
+            if field_name not in file_fields:
+                file_fields[field_name] = {'data_type': data_type, 'occurrences': []}
+            file_fields[field_name]['occurrences'].append({
+                'line_number': line_num,
+                'code_snippet': (
+                    snippet_around(line, max(line.find(field_name), 0)) if len(line) > MAX_LINE_LENGTH
+                    else line.strip()
+                )
+            })
+        for line_num, _, pattern_category, sub_type in sorted(integration_hits):
+            line = content[line_num - 1]
+            results['integration_patterns'].append({
+                'pattern_type': pattern_category,
+                'sub_type': sub_type,
+                'file_path': str(file_path),
+                'line_number': line_num,
+                'code_snippet': snippet_around(line, 0) if len(line) > MAX_LINE_LENGTH else line.strip()
+            })
+
+    def _source_extension(self, file_path: Path) -> str:
+        """Extension of the source language, looking through a trailing .enc"""
+        path = Path(file_path)
+        return Path(path.stem).suffix if path.suffix == '.enc' else path.suffix
+
+    def matcher_for(self, file_path: Path) -> PatternMatcher:
+        """Compiled patterns for a file's extension, including language-specific packs"""
+        extension = self._source_extension(file_path)
+        matcher = self._matchers.get(extension)
+        if matcher is None:
+            matcher = self._matchers[extension] = PatternMatcher(*merge_packs(
+                self.demographic_patterns, self.integration_patterns, self.pattern_packs, extension
+            ))
+        return matcher
+
+    def generated_reason(self, file_path: Path, content: List[str]) -> str:
+        """Return 'minified' or 'generated' when a file looks machine-written, else None"""
+        name = Path(file_path).name.lower()
+        if any(marker in name for marker in GENERATED_NAME_MARKERS):
+            return 'generated'
+        header = ''.join(content[:GENERATED_HEADER_LINES]).lower()
+        if any(marker in header for marker in GENERATED_HEADER_MARKERS):
+            return 'generated'
+        if content and sum(len(line) for line in content) / len(content) > MINIFIED_AVG_LINE_LENGTH:
+            return 'minified'
+        return None
+
+    def _pattern_timings(self, results: Dict, pattern_seconds: Dict) -> Dict:
+        """Pair each pattern's match time with its hit count: {key: (seconds, matches)}"""
+        matches = dict.fromkeys(pattern_seconds, 0)
+        for fields in results['demographic_data'].values():
+            for data in fields.values():
+                key = f"demographic.{data['data_type']}"
+                matches[key] = matches.get(key, 0) + len(data['occurrences'])
+        for pattern in results['integration_patterns']:
+            key = f"{pattern['pattern_type']}.{pattern['sub_type']}"
+            matches[key] = matches.get(key, 0) + 1
+        return {key: (pattern_seconds.get(key, 0.0), count) for key, count in matches.items()}
+
+    def capture_context(self, file_path: Path, content: List[str], results: Dict) -> List[Dict]:
+        """
+        Cut context windows around every hit from the in-memory lines.
+        Overlapping windows are merged and stored once; each occurrence
+        gets a 'context_id' index into the returned list. Windows are kept
+        in memory only and never written to the HTML report.
+        """
+        occurrences = [
+            occurrence
+            for field in results['demographic_data'].get(str(file_path), {}).values()
+            for occurrence in field['occurrences']
+        ]
+        occurrences.extend(results['integration_patterns'])
+        occurrences.sort(key=lambda occurrence: occurrence['line_number'])
+
+        windows = []
+        for occurrence in occurrences:
+            start = max(1, occurrence['line_number'] - self.context_lines)
+            end = min(len(content), occurrence['line_number'] + self.context_lines)
+            if windows and start <= windows[-1]['end_line'] + 1:
+                windows[-1]['end_line'] = max(windows[-1]['end_line'], end)
+            else:
+                windows.append({'start_line': start, 'end_line': end})
+            occurrence['context_id'] = len(windows) - 1
+
+        for window in windows:
+            window['code'] = ''.join(content[window['start_line'] - 1:window['end_line']])
+        return windows
+
     def update_results(self, main_results: Dict, file_results: Dict, file_path: Path):  
         """  
         Update the main results dictionary with results from a single file  
         """  
         # Update demographic data  
         demographic_fields_count = 0  
+        store = main_results.get('occurrence_store')
         for file, fields in file_results['demographic_data'].items():  
+            demographic_fields_count += sum(len(data['occurrences']) for data in fields.values())  
+            main_results['summary']['unique_demographic_fields'].update(fields.keys())  
+            if store is not None:
+                # Compact results: the store takes the whole file below
+                continue
             if file not in main_results['demographic_data']:  
                 main_results['demographic_data'][file] = fields  
             else:  
@@ -213,23 +990,34 @@ class CodeAnalyzer:
                         main_results['demographic_data'][file][field_name] = data  
                     else:  
                         main_results['demographic_data'][file][field_name]['occurrences'].extend(data['occurrences'])  
-            demographic_fields_count += sum(len(data['occurrences']) for data in fields.values())  
-            main_results['summary']['unique_demographic_fields'].update(fields.keys())  
+
+        if file_results.get('generated'):
+            main_results['summary']['generated_files'].append({
+                'file_path': str(file_path),
+                'reason': file_results['generated']
+            })
+        main_results['summary']['oversized_lines'] += file_results.get('oversized_lines', 0)
+        if file_results.get('fingerprints'):
+            main_results.setdefault('fingerprints', {})[str(file_path)] = file_results['fingerprints']
+
+        if self.metrics is not None and 'timings' in file_results:
+            self.metrics.add_file(file_path, file_results['timings'])
+
+        # Context windows are keyed by file and stored once per file
+        main_results['context_windows'].update(file_results.get('context_windows', {}))
 
         # Update integration patterns  
         integration_patterns_count = len(file_results['integration_patterns'])  
-        main_results['integration_patterns'].extend(  
-            file_results['integration_patterns']  
-        )  
+        if store is not None:
+            store.add_file_results(file_results)
+        else:
+            main_results['integration_patterns'].extend(  
+                file_results['integration_patterns']  
+            )  
 
         # Update summary  
-        main_results['summary']['demographic_fields_found'] = sum(  
-            sum(len(data['occurrences']) for data in fields.values())  
-            for fields in main_results['demographic_data'].values()  
-        )  
-        main_results['summary']['integration_patterns_found'] = len(  
-            main_results['integration_patterns']  
-        )  
+        main_results['summary']['demographic_fields_found'] += demographic_fields_count
+        main_results['summary']['integration_patterns_found'] += integration_patterns_count
 
         # Add file details to summary  
         main_results['summary']['file_details'].append({  
@@ -292,6 +1080,10 @@ class CodeAnalyzer:
                 {self._generate_integration_summary_html(results['summary']['file_details'])}
             </div>
 
+            {self._generate_delta_html(results)}
+
+            {self._generate_scan_cost_html(results)}
+
             <div class="section">
                 <h2>Demographic Data Fields by File</h2>
                 {self._generate_demographic_html(results['demographic_data'])}
@@ -308,6 +1100,75 @@ class CodeAnalyzer:
         with open(filename, 'w') as f:
             f.write(html_content)
 
+    def _report_snippet(self, file_path: str, snippet: str) -> str:
+        """Snippet as written to the report; plaintext of encrypted sources only when opted in"""
+        if str(file_path).endswith('.enc') and not self.report_encrypted_snippets:
+            return REDACTED_SNIPPET
+        return snippet
+
+    def _generate_delta_html(self, results: Dict) -> str:
+        """Generate the added/removed tables of a differential scan, when present"""
+        delta = results.get('delta')
+        if not delta:
+            return ""
+
+        html = f"""
+        <div class="section">
+            <h2>Changes {delta['base_ref']}..{delta['head_ref']}</h2>
+            <p>Commits: {delta['base_commit'][:12]}..{delta['head_commit'][:12]}, {len(delta['files'])} changed files</p>
+        """
+        tables = [
+            ('Demographic Fields Added', 'demographic_added', 'field_name', 'data_type'),
+            ('Demographic Fields Removed', 'demographic_removed', 'field_name', 'data_type'),
+            ('Integration Patterns Added', 'integration_added', 'pattern_type', 'sub_type'),
+            ('Integration Patterns Removed', 'integration_removed', 'pattern_type', 'sub_type')
+        ]
+        for title, kind, name, detail in tables:
+            html += f"""
+            <h3>{title} ({len(delta[kind])})</h3>
+            <table>
+                <tr><th>File Path</th><th>Line</th><th>{name.replace('_', ' ').title()}</th><th>{detail.replace('_', ' ').title()}</th><th>Code</th></tr>
+            """
+            for entry in delta[kind]:
+                html += (
+                    f"<tr><td>{entry['file_path']}</td><td>{entry['line_number']}</td><td>{entry[name]}</td>"
+                    f"<td>{entry[detail]}</td><td>{self._report_snippet(entry['file_path'], entry['code_snippet'])}</td></tr>"
+                )
+            html += "</table>"
+        return html + "</div>"
+
+    def _generate_scan_cost_html(self, results: Dict) -> str:
+        """Generate the pattern cost table and the minified/generated file list, when present"""
+        performance = results['metadata'].get('performance')
+        generated_files = results['summary'].get('generated_files', [])
+        oversized_lines = results['summary'].get('oversized_lines', 0)
+        if not performance and not generated_files and not oversized_lines:
+            return ""
+
+        html = '<div class="section"><h2>Scan Cost</h2>'
+        if oversized_lines:
+            html += f"<p>Oversized lines matched in bounded windows: {oversized_lines}</p>"
+        if performance:
+            html += """
+            <h3>Match Time by Pattern</h3>
+            <table>
+                <tr><th>Pattern</th><th>Seconds</th><th>Matches</th></tr>
+            """
+            for cost in performance['patterns']:
+                html += f"<tr><td>{cost['pattern']}</td><td>{cost['seconds']}</td><td>{cost['matches']}</td></tr>"
+            html += "</table>"
+        if generated_files:
+            action = "skipped" if self.skip_generated else "scanned"
+            html += f"""
+            <h3>Minified or Generated Files ({action})</h3>
+            <table>
+                <tr><th>File Path</th><th>Reason</th></tr>
+            """
+            for generated in generated_files:
+                html += f"<tr><td>{generated['file_path']}</td><td>{generated['reason']}</td></tr>"
+            html += "</table>"
+        return html + "</div>"
+
     def _generate_demographic_summary_html(self, file_details: List[Dict]) -> str:
         """Generate HTML table for demographic field summary"""
         # Filter out entries with zero demographic fields
@@ -393,7 +1254,7 @@ class CodeAnalyzer:
                 for occurrence in data['occurrences']:  
                     html += f"""  
                     <div class="code">  
-                        <p>Line {occurrence['line_number']}: {occurrence['code_snippet']}</p>  
+                        <p>Line {occurrence['line_number']}: {self._report_snippet(file_path, occurrence['code_snippet'])}</p>  
                     </div>  
                     """  
                 html += "</div>"  
@@ -409,7 +1270,7 @@ class CodeAnalyzer:
                 <p>File: {pattern['file_path']}</p>
                 <p>Line: {pattern['line_number']}</p>
                 <div class="code">
-                    <p>{pattern['code_snippet']}</p>
+                    <p>{self._report_snippet(pattern['file_path'], pattern['code_snippet'])}</p>
                 </div>
             </div>
             """  
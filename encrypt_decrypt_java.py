@@ -2,49 +2,224 @@ import os
 import sys
 import base64
 import getpass
+import hashlib
+import io
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.fernet import Fernet
-
-def encrypt_file(file_path, key):
-    """Encrypts a Java file using the provided key."""
-    cipher = Fernet(key)
-
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# Streaming format: a header, then fixed-size AES-GCM segments. Each segment's
+# nonce is the header's random prefix + a segment counter + a last-segment flag,
+# and the header is authenticated with every segment, so segments can't be
+# reordered, truncated or spliced between files.
+STREAM_MAGIC = b"ZCAENC\x00\x02"
+CHUNK_SIZE = 64 * 1024
+NONCE_PREFIX_SIZE = 7
+SALT_SIZE = 16
+# magic, chunk size, nonce prefix, scrypt salt, log2(N), r, p
+HEADER = struct.Struct(">8sI7s16sBBB")
+TAG_SIZE = 16
+
+# scrypt cost: N=2**15, r=8 takes ~0.1s and 32 MB, so keys are cached per salt
+SCRYPT_LOG2_N = 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+
+class PassphraseKeys:
+    """Derives stream keys from a passphrase with scrypt, caching one key per salt.
+
+    New files are encrypted with self.salt, so every file in a bulk run shares
+    one salt and one derivation; decrypting files with different salts derives
+    each distinct salt once. Safe to share between worker threads.
+    """
+
+    def __init__(self, passphrase, salt=None):
+        self.passphrase = passphrase.encode()
+        self.salt = salt or os.urandom(SALT_SIZE)
+        self._keys = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def derive(self, salt, log2_n=SCRYPT_LOG2_N, r=SCRYPT_R, p=SCRYPT_P):
+        params = (salt, log2_n, r, p)
+        with self._lock:
+            # One lock per salt so concurrent workers wait for a single derivation
+            lock = self._locks.setdefault(params, threading.Lock())
+        with lock:
+            if params not in self._keys:
+                self._keys[params] = hashlib.scrypt(
+                    self.passphrase, salt=salt, n=1 << log2_n, r=r, p=p,
+                    maxmem=256 * r * (1 << log2_n) * p, dklen=32
+                )
+            return self._keys[params]
+
+    def legacy_key(self):
+        """Fernet key built the way files from earlier versions were encrypted."""
+        return base64.urlsafe_b64encode(self.passphrase.ljust(32)[:32])
+
+
+def _segment_nonce(prefix, index, last):
+    return prefix + struct.pack(">IB", index, 1 if last else 0)
+
+
+def encrypt_stream(source, destination, keys, chunk_size=CHUNK_SIZE):
+    """Encrypts source into destination in constant memory using authenticated segments."""
+    cipher = AESGCM(keys.derive(keys.salt))
+    prefix = os.urandom(NONCE_PREFIX_SIZE)
+    header = HEADER.pack(STREAM_MAGIC, chunk_size, prefix, keys.salt, SCRYPT_LOG2_N, SCRYPT_R, SCRYPT_P)
+    destination.write(header)
+
+    index = 0
+    chunk = source.read(chunk_size)
+    while True:
+        # Read one segment ahead so the final segment can be flagged as last
+        next_chunk = source.read(chunk_size)
+        last = not next_chunk
+        destination.write(cipher.encrypt(_segment_nonce(prefix, index, last), chunk, header))
+        if last:
+            return
+        chunk = next_chunk
+        index += 1
+
+
+def decrypt_stream(source, destination, keys):
+    """Decrypts a stream written by encrypt_stream. Raises InvalidTag on a wrong key or tampering,
+    ValueError on an unknown format or header parameters."""
+    magic = source.read(len(STREAM_MAGIC))
+    if magic != STREAM_MAGIC:
+        raise ValueError("Not a streaming encrypted file")
+    header = magic + source.read(HEADER.size - len(magic))
+    _, chunk_size, prefix, salt, log2_n, r, p = HEADER.unpack(header)
+    # The header is only authenticated after the key is derived, so its cost
+    # parameters are checked first rather than trusted
+    if (log2_n, r, p) != (SCRYPT_LOG2_N, SCRYPT_R, SCRYPT_P):
+        raise ValueError(f"Unsupported scrypt parameters in stream header: log2(N)={log2_n}, r={r}, p={p}")
+    # Every stream is written with CHUNK_SIZE; anything else would size reads from untrusted input
+    if chunk_size != CHUNK_SIZE:
+        raise ValueError(f"Unsupported segment size in stream header: {chunk_size}")
+    cipher = AESGCM(keys.derive(salt, log2_n, r, p))
+
+    index = 0
+    segment = source.read(chunk_size + TAG_SIZE)
+    while True:
+        next_segment = source.read(chunk_size + TAG_SIZE)
+        last = not next_segment
+        destination.write(cipher.decrypt(_segment_nonce(prefix, index, last), segment, header))
+        if last:
+            return
+        segment = next_segment
+        index += 1
+
+
+def is_stream_encrypted(file_path):
+    """Checks whether a file uses the streaming format rather than a single Fernet token."""
     with open(file_path, "rb") as file:
-        file_data = file.read()
+        return file.read(len(STREAM_MAGIC)) == STREAM_MAGIC
 
-    encrypted_data = cipher.encrypt(file_data)
 
-    encrypted_file_path = file_path + ".enc"
-    with open(encrypted_file_path, "wb") as enc_file:
-        enc_file.write(encrypted_data)
+def decrypt_bytes(encrypted_file_path, keys):
+    """Decrypts an encrypted file into memory without writing plaintext to disk."""
+    with open(encrypted_file_path, "rb") as enc_file:
+        return decrypt_fileobj(enc_file, keys)
 
-    print(f"✅ File '{file_path}' has been encrypted and saved as '{encrypted_file_path}'.")
 
-def decrypt_file(encrypted_file_path, key):
-    """Decrypts an encrypted Java file using the provided key."""
-    cipher = Fernet(key)
+def decrypt_fileobj(enc_file, keys):
+    """Decrypts an encrypted file object (a file, a BytesIO, an archive member) into memory."""
+    if enc_file.read(len(STREAM_MAGIC)) == STREAM_MAGIC:
+        enc_file.seek(0)
+        plaintext = io.BytesIO()
+        decrypt_stream(enc_file, plaintext, keys)
+        return plaintext.getvalue()
+    enc_file.seek(0)
+    return Fernet(keys.legacy_key()).decrypt(enc_file.read())
 
-    with open(encrypted_file_path, "rb") as enc_file:
-        encrypted_data = enc_file.read()
 
-    try:
-        decrypted_data = cipher.decrypt(encrypted_data)
-    except Exception:
-        print("❌ Decryption failed! Ensure you used the correct key.")
-        return
+def encrypt_file(file_path, keys, quiet=False):
+    """Encrypts a Java file using the provided PassphraseKeys. Returns the number of bytes encrypted."""
+    encrypted_file_path = file_path + ".enc"
+    with open(file_path, "rb") as file, open(encrypted_file_path, "wb") as enc_file:
+        encrypt_stream(file, enc_file, keys)
 
-    # Remove the .enc extension from the file name
-    decrypted_file_path = encrypted_file_path.replace(".enc", "")
+    if not quiet:
+        print(f"✅ File '{file_path}' has been encrypted and saved as '{encrypted_file_path}'.")
+    return os.path.getsize(file_path)
 
-    with open(decrypted_file_path, "wb") as file:
-        file.write(decrypted_data)
+def decrypt_file(encrypted_file_path, keys, quiet=False):
+    """Decrypts an encrypted Java file using the provided PassphraseKeys. Returns the bytes decrypted, or None on failure."""
+    # Remove the .enc extension from the file name
+    if encrypted_file_path.endswith(".enc"):
+        decrypted_file_path = encrypted_file_path[:-len(".enc")]
+    else:
+        decrypted_file_path = encrypted_file_path.replace(".enc", "")
+    # Write to a temporary file so a failed decryption never leaves partial plaintext behind
+    partial_file_path = decrypted_file_path + ".part"
 
-    print(f"✅ File '{encrypted_file_path}' has been decrypted and saved as '{decrypted_file_path}'.")
+    try:
+        with open(encrypted_file_path, "rb") as enc_file, open(partial_file_path, "wb") as file:
+            if is_stream_encrypted(encrypted_file_path):
+                decrypt_stream(enc_file, file, keys)
+            else:
+                # Files from earlier versions hold a single Fernet token
+                file.write(Fernet(keys.legacy_key()).decrypt(enc_file.read()))
+    except Exception:
+        if os.path.exists(partial_file_path):
+            os.remove(partial_file_path)
+        print(f"❌ Decryption of '{encrypted_file_path}' failed! Ensure you used the correct key.")
+        return None
+
+    os.replace(partial_file_path, decrypted_file_path)
+    if not quiet:
+        print(f"✅ File '{encrypted_file_path}' has been decrypted and saved as '{decrypted_file_path}'.")
+    return os.path.getsize(decrypted_file_path)
+
+def process_directory(file_function, directory, extension, keys, workers=None):
+    """Runs file_function on every file under directory ending in extension, using a thread pool.
+
+    All workers share one PassphraseKeys, so the key is derived once per
+    salt rather than per file. Prints a summary with throughput and returns
+    (files_processed, files_failed).
+    """
+    file_paths = [
+        os.path.join(root, name)
+        for root, _, files in os.walk(directory)
+        for name in files
+        if name.endswith(extension)
+    ]
+
+    def run(file_path):
+        try:
+            return file_function(file_path, keys, quiet=True)
+        except Exception as e:
+            print(f"❌ Error processing '{file_path}': {e}")
+            return None
+
+    start = time.perf_counter()
+    processed = failed = total_bytes = 0
+    # Work is dominated by file I/O, which releases the GIL, so threads avoid process start-up cost
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for size in executor.map(run, file_paths):
+            if size is None:
+                failed += 1
+            else:
+                processed += 1
+                total_bytes += size
+    elapsed = time.perf_counter() - start
+
+    megabytes = total_bytes / (1024 * 1024)
+    print(f"📊 {processed} file(s) processed, {failed} failed, {megabytes:.2f} MB in {elapsed:.2f}s "
+          f"({megabytes / elapsed if elapsed else 0:.2f} MB/s)")
+    return processed, failed
 
 def main():
     if len(sys.argv) < 3:
         print("Usage:")
-        print("  Encrypt: python3 encrypt_decrypt_java.py encrypt <file_path>")
-        print("  Decrypt: python3 encrypt_decrypt_java.py decrypt <encrypted_file_path>")
+        print("  Encrypt: python3 encrypt_decrypt_java.py encrypt <file_path|directory> [extension]")
+        print("  Decrypt: python3 encrypt_decrypt_java.py decrypt <encrypted_file_path|directory> [extension]")
+        print("  For directories, extension defaults to '.java' when encrypting and '.enc' when decrypting.")
         sys.exit(1)
 
     mode = sys.argv[1].lower()
@@ -54,22 +229,25 @@ def main():
         print("❌ Error: The specified file does not exist.")
         sys.exit(1)
 
+    if mode not in ("encrypt", "decrypt"):
+        print("❌ Invalid mode. Use 'encrypt' or 'decrypt'.")
+        sys.exit(1)
+
     key_input = getpass.getpass("🔑 Enter the encryption/decryption key: ").strip()
 
-    try:
-        key = base64.urlsafe_b64encode(key_input.encode().ljust(32)[:32])  # Ensure 32 bytes
-        Fernet(key)  # Validate key
-    except Exception:
-        print("❌ Invalid key. Ensure it is a Base64 encoded 32-byte key.")
+    if not key_input:
+        print("❌ Invalid key. The key must not be empty.")
         sys.exit(1)
-
-    if mode == "encrypt":
-        encrypt_file(file_path, key)
-    elif mode == "decrypt":
-        decrypt_file(file_path, key)
-    else:
-        print("❌ Invalid mode. Use 'encrypt' or 'decrypt'.")
+    keys = PassphraseKeys(key_input)
+
+    file_function = encrypt_file if mode == "encrypt" else decrypt_file
+    if os.path.isdir(file_path):
+        extension = sys.argv[3] if len(sys.argv) > 3 else (".java" if mode == "encrypt" else ".enc")
+        _, failed = process_directory(file_function, file_path, extension, keys)
+        if failed:
+            sys.exit(1)
+    elif file_function(file_path, keys) is None:
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,25 +1,11 @@
 import os
 import sys
-import base64
-from cryptography.fernet import Fernet
-
-def encrypt_file(file_path, key):
-    cipher = Fernet(key)
-
-    with open(file_path, "rb") as file:
-        file_data = file.read()
-
-    encrypted_data = cipher.encrypt(file_data)
-
-    encrypted_file_path = file_path + ".enc"
-    with open(encrypted_file_path, "wb") as enc_file:
-        enc_file.write(encrypted_data)
-
-    print(f"File '{file_path}' has been encrypted and saved as '{encrypted_file_path}'.")
+from encrypt_decrypt_java import PassphraseKeys, encrypt_file, process_directory
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python3 encrypt_java.py <file_path> <encryption_key>")
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python3 encrypt_java.py <file_path|directory> <encryption_key> [extension]")
+        print("For directories, extension defaults to '.java'.")
         sys.exit(1)
 
     file_path = sys.argv[1]
@@ -29,11 +15,15 @@ if __name__ == "__main__":
         print("Error: The specified file does not exist.")
         sys.exit(1)
 
-    try:
-        key = base64.urlsafe_b64encode(key.encode().ljust(32)[:32])  # Ensure 32 bytes
-        Fernet(key)  # Validate the key
-    except Exception:
-        print("Invalid key. Ensure it is a 32-byte Base64 encoded key.")
+    if not key:
+        print("Invalid key. The key must not be empty.")
         sys.exit(1)
-
-    encrypt_file(file_path, key)
\ No newline at end of file
+    keys = PassphraseKeys(key)
+
+    if os.path.isdir(file_path):
+        extension = sys.argv[3] if len(sys.argv) > 3 else ".java"
+        _, failed = process_directory(encrypt_file, file_path, extension, keys)
+        if failed:
+            sys.exit(1)
+    else:
+        encrypt_file(file_path, keys)
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Git-aware differential scans.
+
+Lists the files changed between two commits with `git diff --name-status`,
+reads both versions of every changed file straight from the object database
+with a single `git cat-file --batch` process (no checkout, no worktree
+changes), and compares the demographic fields and integration patterns found
+in each version.
+
+Occurrences are compared by (field or pattern, code snippet) rather than by
+line number, so code that merely moves is not reported as added and removed.
+"""
+import os
+import subprocess
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Git statuses with a version on each side (R: renamed, possibly edited too)
+BASE_STATUSES = frozenset('MDTR')
+HEAD_STATUSES = frozenset('MATR')
+
+
+class GitDiffError(RuntimeError):
+    """Raised when the repository or refs cannot be read with git"""
+
+
+def _git(repo_path: Path, *args: str, stdin: bytes = None) -> bytes:
+    try:
+        completed = subprocess.run(
+            ['git', '-C', str(repo_path), *args], input=stdin, capture_output=True, check=True
+        )
+    except FileNotFoundError:
+        raise GitDiffError("git is not installed or not on PATH")
+    except subprocess.CalledProcessError as e:
+        raise GitDiffError(f"git {args[0]} failed: {e.stderr.decode('utf-8', 'replace').strip()}")
+    return completed.stdout
+
+
+def resolve_commit(repo_path: Path, ref: str) -> str:
+    """Full commit id for a branch, tag or revision expression"""
+    try:
+        return _git(repo_path, 'rev-parse', '--verify', '--quiet', f'{ref}^{{commit}}').decode().strip()
+    except GitDiffError:
+        raise GitDiffError(f"'{ref}' is not a commit in {repo_path}")
+
+
+def changed_files(repo_path: Path, base: str, head: str) -> List[Tuple[str, str, str]]:
+    """
+    [(status letter, base path, head path)] for files changed between two
+    commits, with paths relative to repo_path; renames keep both paths
+    """
+    output = _git(repo_path, 'diff', '--name-status', '--find-renames', '--relative', '-z', base, head)
+    fields = output.decode('utf-8', 'surrogateescape').split('\0')
+    changes = []
+    index = 0
+    while index < len(fields) - 1:
+        status = fields[index][0]
+        if status in 'RC':
+            changes.append((status, fields[index + 1], fields[index + 2]))
+            index += 3
+        else:
+            changes.append((status, fields[index + 1], fields[index + 1]))
+            index += 2
+    return changes
+
+
+def read_blobs(repo_path: Path, specs: List[str]) -> Dict[str, bytes]:
+    """
+    Read '<commit>:<path>' blobs in one `git cat-file --batch` call;
+    specs that do not resolve are left out.
+    """
+    if not specs:
+        return {}
+    # './' makes each path relative to repo_path rather than the repository root
+    request = ''.join(f"{spec.replace(':', ':./', 1)}\n" for spec in specs).encode('utf-8', 'surrogateescape')
+    output = _git(repo_path, 'cat-file', '--batch', stdin=request)
+
+    blobs = {}
+    offset = 0
+    for spec in specs:
+        header_end = output.index(b'\n', offset)
+        header = output[offset:header_end].split()
+        offset = header_end + 1
+        if len(header) != 3 or header[1] != b'blob':
+            continue
+        size = int(header[2])
+        blobs[spec] = output[offset:offset + size]
+        offset += size + 1
+    return blobs
+
+
+def read_file_at(repo_path: Path, commit: str, file_path: str) -> bytes:
+    """
+    Content of file_path (absolute, or relative to repo_path) at a commit;
+    raises FileNotFoundError when it cannot be read from git
+    """
+    spec = f"{commit}:{Path(os.path.relpath(file_path, repo_path)).as_posix()}"
+    try:
+        blob = read_blobs(repo_path, [spec]).get(spec)
+    except GitDiffError as e:
+        raise FileNotFoundError(str(e))
+    if blob is None:
+        raise FileNotFoundError(f"{file_path} at {commit}")
+    return blob
+
+
+def occurrence_index(file_results: Dict) -> Tuple[Dict, Dict]:
+    """
+    Index analyze_content results by comparison key: (field, data type,
+    snippet) and (pattern type, sub type, snippet) -> [line numbers]
+    """
+    demographic = {}
+    for fields in file_results['demographic_data'].values():
+        for field_name, data in fields.items():
+            for occurrence in data['occurrences']:
+                key = (field_name, data['data_type'], occurrence['code_snippet'])
+                demographic.setdefault(key, []).append(occurrence['line_number'])
+    integration = {}
+    for pattern in file_results['integration_patterns']:
+        key = (pattern['pattern_type'], pattern['sub_type'], pattern['code_snippet'])
+        integration.setdefault(key, []).append(pattern['line_number'])
+    return demographic, integration
+
+
+def _difference(file_path: str, current: Dict, previous: Dict, names: Tuple[str, str]) -> List[Dict]:
+    """Occurrences in current beyond those with the same key in previous"""
+    extra = Counter({key: len(lines) for key, lines in current.items()})
+    extra.subtract({key: len(lines) for key, lines in previous.items()})
+    entries = []
+    for key, count in extra.items():
+        if count <= 0:
+            continue
+        # With repeated identical snippets the last ones are taken as the new ones
+        for line_number in current[key][-count:]:
+            entries.append({
+                'file_path': file_path,
+                names[0]: key[0],
+                names[1]: key[1],
+                'line_number': line_number,
+                'code_snippet': key[2]
+            })
+    return sorted(entries, key=lambda entry: entry['line_number'])
+
+
+def diff_file_results(file_path: str, base_results: Dict, head_results: Dict) -> Dict[str, List[Dict]]:
+    """Demographic and integration occurrences added and removed in one file"""
+    base_demographic, base_integration = occurrence_index(base_results)
+    head_demographic, head_integration = occurrence_index(head_results)
+    field_names = ('field_name', 'data_type')
+    pattern_names = ('pattern_type', 'sub_type')
+    return {
+        'demographic_added': _difference(file_path, head_demographic, base_demographic, field_names),
+        'demographic_removed': _difference(file_path, base_demographic, head_demographic, field_names),
+        'integration_added': _difference(file_path, head_integration, base_integration, pattern_names),
+        'integration_removed': _difference(file_path, base_integration, head_integration, pattern_names)
+    }
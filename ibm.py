@@ -1,77 +1,795 @@
 import os
 import re
+import json
+import hashlib
+import sqlite3
 import networkx as nx
 import matplotlib.pyplot as plt
 import streamlit as st
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from codescan import DEMOGRAPHIC_PATTERNS
+
+MAINFRAME_EXTENSIONS = ('.cbl', '.jcl', '.cpy', '.sql')
+
+# Token patterns, compiled once per process. Like the findall patterns they replace,
+# COBOL and JCL keywords are matched upper-case; SQL is upper-cased before matching.
+# Every COBOL token starts or (for EXEC) ends its keyword with 'C', so one sweep keeps
+# the re module's literal-prefix search; group names are the event types
+COBOL_TOKEN_PATTERN = re.compile(
+    r"C(?:OPY\s+['\"]?(?P<COPY>[A-Z0-9#@$-]+)"
+    r"|ALL\s+['\"](?P<CALL>[A-Z0-9#@$-]+)['\"]"
+    r"|(?<=EXEC)\s+(?P<EXEC>SQL|CICS)\b)"
+)
+CICS_PROGRAM_PATTERN = re.compile(r"\b(?:LINK|XCTL)\b.*?\bPROGRAM\s*\(\s*['\"]?([A-Z0-9#@$-]+)")
+SQL_INCLUDE_PATTERN = re.compile(r"^INCLUDE\s+([A-Z0-9#@$-]+)")
+# Applied to whitespace-normalized statements with a leading space, so a single space
+# precedes every keyword and separates it from the table
+SQL_TABLE_PATTERN = re.compile(r" (FROM|JOIN|INTO|UPDATE) ([A-Z0-9_#@$]+(?:\.[A-Z0-9_#@$]+)?)")
+JCL_EXEC_PATTERN = re.compile(r"^//(?!\*)\S*\s+EXEC\s+(?:(?:PGM|PROC)=)?([A-Z0-9#@$.]+)", re.MULTILINE)
+SQL_COMMENT_PATTERN = re.compile(r"--[^\n]*")
+# Copybook record layouts: sentences end in a period followed by whitespace
+SENTENCE_END_PATTERN = re.compile(r"\.(?:\s+|$)")
+COPY_SENTENCE_PATTERN = re.compile(r"\s*COPY\s+['\"]?([A-Z0-9#@$-]+)")
+DATA_ENTRY_PATTERN = re.compile(r"\s*(\d{1,2})\s+([A-Z0-9][A-Z0-9-]*)")
+PICTURE_PATTERN = re.compile(r"\bPIC(?:TURE)?\s+(?:IS\s+)?(\S+)")
+SQL_VERBS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+# DB2 communication areas are included by nearly every program and aren't real dependencies
+SQL_SYSTEM_INCLUDES = {'SQLCA', 'SQLDA'}
+
+# Below this many members the process pool costs more than it saves
+PARALLEL_THRESHOLD = 64
+
+# Bump whenever parse_member's output shape changes so stale caches are ignored
+CACHE_VERSION = 3
+
+# Rendering limits: spring layout and labels only pay off on small graphs
+SPRING_LAYOUT_LIMIT = 200
+LABEL_LIMIT = 300
+ARROW_LIMIT = 2000
+LAYOUT_CACHE_SIZE = 16
+
+# Dependency kinds recorded on graph edges, keyed by parse_member output
+DEPENDENCY_KINDS = {'copybooks': 'copy', 'execs': 'exec', 'calls': 'call'}
+
+
+def cobol_lines(lines):
+    """Yield normalized COBOL lines from fixed-format source.
+
+    Drops the sequence (1-6) and identification (73-80) areas, skips comment
+    and debug lines (indicator '*', '/', 'D') and '*>' inline comments, and
+    joins '-' continuation lines onto the line they continue.
+    """
+    pending = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if len(line) < 8:
+            continue
+        indicator, area = line[6], line[7:72]
+        if indicator in '*/Dd':
+            continue
+        comment = area.find('*>')
+        if comment >= 0:
+            area = area[:comment]
+        if indicator == '-' and pending is not None:
+            continued = area.lstrip()
+            if continued[:1] in ('"', "'"):
+                # A continued literal resumes after its opening quote
+                pending = pending + continued[1:]
+            else:
+                pending = pending.rstrip() + continued
+            continue
+        if pending is not None:
+            yield pending
+        pending = area
+    if pending is not None:
+        yield pending
+
+
+def sql_events(statement):
+    """Return ('SQL', [query_type, table]) events for one SQL statement.
+
+    The first table takes the statement's verb; tables referenced by
+    sub-selects (FROM/JOIN after the target) are reported as SELECT.
+    """
+    verb = statement.partition(' ')[0]
+    if verb == 'DECLARE' and ' CURSOR ' in statement:
+        verb = 'SELECT'
+    if verb not in SQL_VERBS:
+        return []
+    tables = SQL_TABLE_PATTERN.findall(' ' + statement)
+    if verb == 'SELECT':
+        return [('SQL', ['SELECT', table]) for keyword, table in tables if keyword in ('FROM', 'JOIN')]
+    return [('SQL', [verb if position == 0 else 'SELECT', table]) for position, (_, table) in enumerate(tables)]
+
+
+def exec_block_events(kind, block):
+    """Return events for the normalized body of one EXEC SQL or EXEC CICS block."""
+    if kind == 'CICS':
+        return [('CALL', program) for program in CICS_PROGRAM_PATTERN.findall(block)]
+    include = SQL_INCLUDE_PATTERN.match(block)
+    if include:
+        return [] if include.group(1) in SQL_SYSTEM_INCLUDES else [('COPY', include.group(1))]
+    return sql_events(block)
+
+
+def exec_block_body(text, line_start, kind, end, block_end):
+    """Return the code-area text of an EXEC block between its keyword (ending at end) and block_end.
+
+    Lines after the first keep columns 8-72 and comment lines are dropped;
+    blocks with '*>' comments or continuation lines go through cobol_lines.
+    """
+    first_end = text.find('\n', end, block_end)
+    if first_end < 0:
+        return text[end:block_end]
+    if text.find('*>', line_start, block_end) < 0:
+        areas = [text[end:min(first_end, line_start + 72)]]
+        for line in text[first_end + 1:block_end].split('\n'):
+            indicator = line[6:7]
+            if indicator == '-':
+                break
+            # Lines too short to have an indicator have no code area either
+            if indicator not in '*/Dd':
+                areas.append(line[7:72])
+        else:
+            return ' '.join(areas)
+
+    line_end = text.find('\n', block_end)
+    block = ' '.join(cobol_lines(text[line_start:len(text) if line_end < 0 else line_end].split('\n')))
+    body_start = block.find(kind, end - line_start - 7 - len(kind)) + len(kind)
+    body_end = block.find('END-EXEC', body_start)
+    return block[body_start:body_end if body_end >= 0 else len(block)]
+
+
+def in_literal_or_comment(text, code_start, position):
+    """Check whether position falls inside a quoted literal or an inline '*>' comment.
+
+    Quotes are tracked from code_start (column 8); a doubled quote inside a
+    literal closes and reopens it, which leaves the state unchanged.
+    """
+    quote = None
+    for index in range(code_start, position):
+        char = text[index]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char == "'" or char == '"':
+            quote = char
+        elif char == '*' and text[index + 1:index + 2] == '>':
+            return True
+    return quote is not None
+
+
+def tokenize_cobol(text):
+    """Return COPY, CALL and SQL events from COBOL programs or copybooks in one pass.
+
+    A single regex sweep finds the candidate tokens in file order.
+    Fixed-format rules (columns 8-72 only, no comment or debug lines, no
+    '*>' inline comments, nothing inside quoted literals) are applied at
+    each candidate. EXEC blocks run to
+    END-EXEC and are reduced to their code area before tables are extracted;
+    a block without END-EXEC is skipped and scanning resumes after its keyword.
+    """
+    events = []
+    pos = 0
+    for match in COBOL_TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        start, end = match.span()
+        if kind == 'EXEC':
+            start -= len('EXE')
+        before = text[start - 1:start]
+        if start < pos or before.isalnum() or before == '-':
+            continue
+        line_start = text.rfind('\n', 0, start) + 1
+        if (start - line_start < 7 or end - line_start > 72 or text[line_start + 6] in '*/Dd'
+                or in_literal_or_comment(text, line_start + 7, start)):
+            continue
+
+        if kind != 'EXEC':
+            events.append((kind, match[kind]))
+            pos = end
+            continue
+        block_end = text.find('END-EXEC', end)
+        if block_end < 0:
+            # An unterminated block has no reliable extent; keep scanning after its keyword
+            pos = end
+            continue
+        body = exec_block_body(text, line_start, match[kind], end, block_end)
+        events += exec_block_events(match[kind], ' '.join(body.split()).upper())
+        pos = block_end + len('END-EXEC')
+    return events
+
+
+def tokenize_jcl(content):
+    """Yield EXEC events for the programs and procedures run by JCL steps.
+
+    Only '//' statements are matched, so '//*' comments and in-stream data
+    are skipped; the program or procedure is always the first EXEC operand,
+    which JCL requires on the EXEC statement's own line.
+    """
+    for target in JCL_EXEC_PATTERN.findall(content):
+        yield 'EXEC', target
+
+
+def tokenize_sql(content):
+    """Yield SQL events from a plain SQL member, skipping '--' comments."""
+    text = SQL_COMMENT_PATTERN.sub('', content.upper())
+    for statement in text.split(';'):
+        yield from sql_events(' '.join(statement.split()))
+
+
+TOKENIZERS = {
+    '.cbl': tokenize_cobol,
+    '.cpy': tokenize_cobol,
+    '.jcl': tokenize_jcl,
+    '.sql': tokenize_sql
+}
+
+# Maps tokenizer event types to parse_member output keys
+EVENT_KEYS = {'COPY': 'copybooks', 'EXEC': 'execs', 'CALL': 'calls', 'SQL': 'data_flows'}
+
+
+def parse_member(content, file_path):
+    """Parse the text of one member into its dependencies and DB2 data flows."""
+    parsed = {key: [] for key in EVENT_KEYS.values()}
+    tokenizer = TOKENIZERS[os.path.splitext(file_path)[1].lower()]
+    for event, value in tokenizer(content):
+        parsed[EVENT_KEYS[event]].append(value)
+    return parsed
+
+
+def extract_member(file_path, cached_hash=None):
+    """Read and parse one member, skipping the parse if its content hash is unchanged.
+
+    Runs in worker processes, so it only takes and returns plain picklable values.
+    Returns (file_path, content_hash, parsed) where parsed is None when the
+    member matches cached_hash, or (file_path, None, None) if it can't be read.
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            raw = file.read()
+        content_hash = hashlib.sha1(raw).hexdigest()
+        if content_hash == cached_hash:
+            return file_path, content_hash, None
+        return file_path, content_hash, parse_member(raw.decode('utf-8'), file_path)
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        return file_path, None, None
+
+
+def demographic_type(field_name, compiled_patterns):
+    """Return the demographic data type a COBOL field name matches, or None.
+
+    Names are tried as written (hyphens act as word boundaries, so CUST-SSN
+    matches 'ssn') and with underscores (so FIRST-NAME matches 'first_name').
+    """
+    for candidate in (field_name, field_name.replace('-', '_')):
+        for data_type, pattern in compiled_patterns.items():
+            if pattern.search(candidate):
+                return data_type
+    return None
+
+
+def group_name(node):
+    """Map a graph node to its program, job or table name, e.g. 'PROG1.cbl' -> 'PROG1'."""
+    if node.startswith('DB: '):
+        return node
+    # Strip COBOL sentence periods, JCL parameter separators and PGM= prefixes
+    name = node.strip('"\'').rstrip('.,').split('=')[-1]
+    root, ext = os.path.splitext(name)
+    if ext.lower() in MAINFRAME_EXTENSIONS:
+        name = root
+    return name.upper()
+
+
+def neighbourhood(graph, focus, hops):
+    """Return the subgraph within hops edges (either direction) of the focus module."""
+    key = group_name(focus)
+    centres = [node for node in graph if node == focus or group_name(node) == key]
+    undirected = graph.to_undirected(as_view=True)
+    nodes = set()
+    for centre in centres:
+        nodes.update(nx.single_source_shortest_path_length(undirected, centre, cutoff=hops))
+    return graph.subgraph(nodes)
+
+
+def hierarchical_layout(graph):
+    """Lay nodes out in layers by topological generation of the condensation DAG.
+
+    Linear in nodes and edges, unlike spring_layout's quadratic iterations;
+    members of a call cycle share a layer.
+    """
+    condensed = nx.condensation(graph)
+    pos = {}
+    for layer, generation in enumerate(nx.topological_generations(condensed)):
+        members = sorted(node for scc in generation for node in condensed.nodes[scc]['members'])
+        offset = (len(members) - 1) / 2
+        for index, node in enumerate(members):
+            pos[node] = (index - offset, -layer)
+    return pos
+
+
+def graph_fingerprint(graph):
+    """Return a hash of the graph's exact node and edge structure."""
+    return hashlib.sha1(
+        repr((sorted(map(str, graph.nodes)), sorted(map(str, graph.edges)))).encode()
+    ).hexdigest()
+
+
+@st.cache_data(max_entries=LAYOUT_CACHE_SIZE, show_spinner=False)
+def cached_layout(fingerprint, _graph):
+    """Compute node positions for a graph once per fingerprint (see graph_fingerprint).
+
+    Cached by Streamlit across reruns and sessions; the graph itself is not
+    hashed, so the fingerprint must describe it.
+    """
+    if _graph.number_of_nodes() <= SPRING_LAYOUT_LIMIT:
+        return nx.spring_layout(_graph, k=0.3)
+    return hierarchical_layout(_graph)
+
 
 class MainframeDFDAnalyzer:
-    def __init__(self, source_dir):
+    def __init__(self, source_dir, cache_file=None, max_workers=None):
         self.source_dir = source_dir
+        self.cache_file = cache_file
+        self.max_workers = max_workers
         self.data_flows = defaultdict(set)
         self.dependencies = defaultdict(set)
+        # module -> {dependency: kind}, used to label graph edges
+        self.dependency_kinds = defaultdict(dict)
+        self.copybooks = None
+        self.member_files = []
         self.graph = nx.DiGraph()
+        # file path -> {'hash': ..., 'parsed': ...}
+        self.parse_cache = self._load_cache()
 
-    def extract_dependencies(self, file_path):
-        """Extract dependencies from COBOL, JCL, CICS, and DB2 files."""
+    def _load_cache(self):
+        """Load the content-hash parse cache from cache_file, if there is one."""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                
-                # Extract dependencies based on common patterns
-                includes = re.findall(r'COPY\s+(\S+)', content)  # COBOL COPYBOOKS
-                jobs = re.findall(r'EXEC\s+(\S+)', content)  # JCL execution calls
-                programs = re.findall(r'CALL\s+"(\S+)"', content)  # COBOL program calls
-                db2_queries = re.findall(r'EXEC SQL\s+(SELECT|INSERT|UPDATE|DELETE)\s+(\S+)', content)
-
-                module_name = os.path.basename(file_path)
-                
-                for dep in includes + jobs + programs:
-                    self.dependencies[module_name].add(dep)
-                    self.graph.add_edge(module_name, dep)
-                
-                for query_type, table in db2_queries:
-                    self.data_flows[module_name].add(f"{query_type} {table}")
-                    self.graph.add_edge(module_name, f"DB: {table}")
+            with open(self.cache_file, 'r', encoding='utf-8') as file:
+                cache = json.load(file)
+            if cache.get('version') != CACHE_VERSION:
+                return {}
+            return cache['members']
         except Exception as e:
-            print(f"Error processing {file_path}: {e}")
+            print(f"Ignoring unreadable cache {self.cache_file}: {e}")
+            return {}
 
-    def analyze_project(self):
-        """Analyze the entire project structure."""
+    def _save_cache(self):
+        """Persist the parse cache so unchanged members are skipped on the next run."""
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as file:
+                json.dump({'version': CACHE_VERSION, 'members': self.parse_cache}, file)
+        except Exception as e:
+            print(f"Error writing cache {self.cache_file}: {e}")
+
+    def get_member_files(self):
+        """List all COBOL, JCL, copybook and SQL members under source_dir."""
+        member_files = []
         for root, _, files in os.walk(self.source_dir):
             for file in files:
-                if file.endswith(('.cbl', '.jcl', '.cpy', '.sql')):
-                    self.extract_dependencies(os.path.join(root, file))
+                if file.lower().endswith(MAINFRAME_EXTENSIONS):
+                    member_files.append(os.path.join(root, file))
+        return member_files
+
+    def extract_dependencies(self, file_path):
+        """Extract dependencies from COBOL, JCL, CICS, and DB2 files."""
+        _, _, parsed = extract_member(file_path)
+        if parsed is not None:
+            self._merge_member(os.path.basename(file_path), parsed)
+            self._build_graph()
+
+    def _merge_member(self, module_name, parsed):
+        """Fold one member's parse result into the dependency and data flow maps."""
+        for key, kind in DEPENDENCY_KINDS.items():
+            for dep in parsed[key]:
+                self.dependencies[module_name].add(dep)
+                self.dependency_kinds[module_name].setdefault(dep, kind)
+        for query_type, table in parsed['data_flows']:
+            self.data_flows[module_name].add(f"{query_type} {table}")
+
+    def _build_graph(self):
+        """Build the graph in one pass from the merged dependency and data flow maps."""
+        self.graph.add_edges_from(
+            (module, dep, {'kind': kind})
+            for module, deps in self.dependency_kinds.items() for dep, kind in deps.items()
+        )
+        self.graph.add_edges_from(
+            (module, f"DB: {flow.split(' ', 1)[1]}", {'kind': 'db'})
+            for module, flows in self.data_flows.items() for flow in flows
+        )
+
+    def _extract_all(self, member_files):
+        """Run extract_member over all members, in a process pool for large projects."""
+        jobs = [(path, self.parse_cache.get(path, {}).get('hash')) for path in member_files]
+        if len(jobs) >= PARALLEL_THRESHOLD and self.max_workers != 1:
+            try:
+                workers = self.max_workers or os.cpu_count() or 1
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    return list(executor.map(
+                        extract_member,
+                        [path for path, _ in jobs],
+                        [cached_hash for _, cached_hash in jobs],
+                        chunksize=max(1, len(jobs) // (4 * workers))
+                    ))
+            except Exception as e:
+                print(f"Process pool unavailable ({e}); extracting serially")
+        return [extract_member(path, cached_hash) for path, cached_hash in jobs]
+
+    def analyze_project(self):
+        """Analyze the entire project structure."""
+        member_files = self.member_files = self.get_member_files()
+
+        parse_cache = {}
+        for file_path, content_hash, parsed in self._extract_all(member_files):
+            if content_hash is None:
+                continue
+            if parsed is None:
+                parsed = self.parse_cache[file_path]['parsed']
+            parse_cache[file_path] = {'hash': content_hash, 'parsed': parsed}
+            self._merge_member(os.path.basename(file_path), parsed)
 
-    def visualize_dfd(self):
-        """Generate a Data Flow Diagram (DFD)."""
-        plt.figure(figsize=(12, 8))
-        pos = nx.spring_layout(self.graph, k=0.3)
-        nx.draw(self.graph, pos, with_labels=True, node_size=3000, node_color='lightblue', edge_color='gray')
-        plt.title("IBM Mainframe Application Data Flow Diagram")
-        st.pyplot(plt)
+        # Dropping entries for members that no longer exist keeps the cache bounded
+        self.parse_cache = parse_cache
+        self._save_cache()
+        self._build_graph()
+
+    def demographic_lineage(self, demographic_patterns=DEMOGRAPHIC_PATTERNS):
+        """Find demographic fields that reach each program through its copybooks.
+
+        Returns {module: [field dict + 'data_type']}. Copybooks are expanded
+        through a CopybookLibrary, so each member is read once however many
+        programs include it.
+        """
+        compiled = {data_type: re.compile(pattern, re.IGNORECASE)
+                    for data_type, pattern in demographic_patterns.items()}
+        self.copybooks = CopybookLibrary(self.member_files or self.get_member_files())
+        field_types = {}
+
+        lineage = {}
+        for module, deps in self.dependency_kinds.items():
+            fields = []
+            for dep, kind in deps.items():
+                if kind != 'copy':
+                    continue
+                for field in self.copybooks.resolve(dep):
+                    if field['name'] not in field_types:
+                        field_types[field['name']] = demographic_type(field['name'], compiled)
+                    if field_types[field['name']]:
+                        fields.append(dict(field, data_type=field_types[field['name']]))
+            if fields:
+                lineage[module] = fields
+        return lineage
+
+    def collapse_graph(self):
+        """Collapse the graph to one node per program, job or DB table.
+
+        Copybooks are folded into every program that includes them (directly or
+        through nested COPY statements), and parallel edges become a weight.
+        """
+        copy_edges = defaultdict(set)
+        other_edges = defaultdict(Counter)
+        for source, target, data in self.graph.edges(data=True):
+            source, target = group_name(source), group_name(target)
+            if data.get('kind') == 'copy':
+                copy_edges[source].add(target)
+            elif source != target:
+                other_edges[source][target] += 1
+        copybook_names = {name for names in copy_edges.values() for name in names}
+
+        collapsed = nx.DiGraph()
+        collapsed.add_nodes_from(
+            name for name in {group_name(node) for node in self.graph} if name not in copybook_names
+        )
+        for owner in list(collapsed.nodes):
+            owned, stack = {owner}, [owner]
+            while stack:
+                for copybook in copy_edges.get(stack.pop(), ()):
+                    if copybook not in owned:
+                        owned.add(copybook)
+                        stack.append(copybook)
+            for member in owned:
+                for target, weight in other_edges.get(member, {}).items():
+                    if target in copybook_names or target == owner:
+                        continue
+                    if collapsed.has_edge(owner, target):
+                        weight += collapsed.edges[owner, target]['weight']
+                    collapsed.add_edge(owner, target, weight=weight)
+        return collapsed
+
+    def visualize_dfd(self, mode='full', focus=None, hops=2):
+        """Generate a Data Flow Diagram (DFD).
+
+        mode='collapsed' draws one node per program/job (see collapse_graph), and
+        focus limits the diagram to the hops-neighbourhood of one module.
+        """
+        graph = self.collapse_graph() if mode == 'collapsed' else self.graph
+        if focus:
+            graph = neighbourhood(graph, focus, hops)
+        if graph.number_of_nodes() == 0:
+            st.info("No modules to draw for the selected view.")
+            return
+
+        node_count = graph.number_of_nodes()
+        fig, ax = plt.subplots(figsize=(12, 8))
+        nx.draw(
+            graph,
+            cached_layout(graph_fingerprint(graph), graph),
+            ax=ax,
+            with_labels=node_count <= LABEL_LIMIT,
+            node_size=3000 if node_count <= 50 else max(20, 150000 // node_count),
+            node_color=['lightcoral' if str(node).startswith('DB: ') else 'lightblue' for node in graph],
+            edge_color='gray',
+            # Per-edge arrow patches dominate draw time on large graphs
+            arrows=graph.number_of_edges() <= ARROW_LIMIT
+        )
+        ax.set_title("IBM Mainframe Application Data Flow Diagram")
+        st.pyplot(fig)
+        plt.close(fig)
 
     def generate_dependency_report(self):
         """Generate dependency report as a string."""
-        report = "\nProject Dependencies Report:\n"
+        lines = ["", "Project Dependencies Report:"]
         for module, deps in self.dependencies.items():
-            report += f"{module} depends on: {', '.join(deps)}\n"
-        
-        report += "\nData Flow Analysis:\n"
+            lines.append(f"{module} depends on: {', '.join(deps)}")
+
+        lines += ["", "Data Flow Analysis:"]
         for module, flows in self.data_flows.items():
-            report += f"{module} interacts with: {', '.join(flows)}\n"
-        return report
+            lines.append(f"{module} interacts with: {', '.join(flows)}")
+        return "\n".join(lines) + "\n"
+
+    def save_index(self, db_path):
+        """Persist the analyzed graph as a queryable DependencyIndex."""
+        return DependencyIndex.build(self, db_path)
+
+class CopybookLibrary:
+    """Resolves COPY members to expanded record layouts, parsing each copybook once.
+
+    Layouts are memoized by copybook name and shared by every program that
+    includes the member; nested COPY statements are expanded from the same
+    cache, and include cycles are recorded in self.cycles instead of recursing.
+    """
+
+    def __init__(self, member_files):
+        self.paths = {}
+        for file_path in member_files:
+            if file_path.lower().endswith('.cpy'):
+                self.paths.setdefault(group_name(os.path.basename(file_path)), file_path)
+        self.layouts = {}
+        self.cycles = []
+        self.missing = set()
+        self._resolving = []
+
+    def resolve(self, name):
+        """Return the expanded layout of a copybook as a list of field dicts."""
+        key = group_name(name)
+        if key in self.layouts:
+            return self.layouts[key]
+        if key in self._resolving:
+            self.cycles.append(self._resolving[self._resolving.index(key):] + [key])
+            return []
+        if key not in self.paths:
+            self.missing.add(key)
+            self.layouts[key] = []
+            return []
+
+        self._resolving.append(key)
+        try:
+            layout = []
+            for entry in self._read_entries(self.paths[key]):
+                if entry[0] == 'COPY':
+                    layout.extend(self.resolve(entry[1]))
+                else:
+                    layout.append({'level': entry[0], 'name': entry[1], 'picture': entry[2], 'copybook': key})
+        finally:
+            self._resolving.pop()
+        self.layouts[key] = layout
+        return layout
+
+    @staticmethod
+    def _read_entries(file_path):
+        """Yield ('COPY', name) and (level, name, picture) entries from a copybook."""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                text = ' '.join(cobol_lines(file))
+        except Exception as e:
+            print(f"Error processing {file_path}: {e}")
+            return
+        for sentence in SENTENCE_END_PATTERN.split(text.upper()):
+            copy = COPY_SENTENCE_PATTERN.match(sentence)
+            if copy:
+                yield 'COPY', copy.group(1)
+                continue
+            entry = DATA_ENTRY_PATTERN.match(sentence)
+            if entry and entry.group(1) != '88' and entry.group(2) != 'FILLER':
+                picture = PICTURE_PATTERN.search(sentence, entry.end())
+                yield entry.group(1).zfill(2), entry.group(2), picture.group(1) if picture else ''
+
+
+class DependencyIndex:
+    """SQLite-backed store of an analyzed mainframe graph for impact analysis.
+
+    Node names are interned by group_name, so 'PROG1.cbl' and a CALL to
+    "PROG1" resolve to the same node, and edges are stored as integer id
+    pairs indexed in both directions. Transitive queries run as recursive
+    CTEs and never touch the source tree.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS nodes (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+        CREATE TABLE IF NOT EXISTS edges (
+            source INTEGER NOT NULL,
+            target INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            detail TEXT NOT NULL DEFAULT '',
+            UNIQUE (source, target, kind, detail)
+        );
+        CREATE INDEX IF NOT EXISTS edges_by_source ON edges (source, kind);
+        CREATE INDEX IF NOT EXISTS edges_by_target ON edges (target, kind);
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(self.SCHEMA)
+
+    @classmethod
+    def build(cls, analyzer, db_path):
+        """Write the analyzer's dependencies and data flows to a fresh index at db_path."""
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        index = cls(db_path)
+        node_ids = {}
+
+        def intern(name):
+            key = group_name(name)
+            if key not in node_ids:
+                node_ids[key] = len(node_ids) + 1
+            return node_ids[key]
+
+        edges = set()
+        for module, deps in analyzer.dependency_kinds.items():
+            for dep, kind in deps.items():
+                edges.add((intern(module), intern(dep), kind, ''))
+        for module, flows in analyzer.data_flows.items():
+            for flow in flows:
+                query_type, table = flow.split(' ', 1)
+                edges.add((intern(module), intern(f"DB: {table}"), 'db', query_type))
+
+        with index.conn:
+            index.conn.executemany(
+                "INSERT INTO nodes (id, name) VALUES (?, ?)",
+                ((node_id, name) for name, node_id in node_ids.items())
+            )
+            index.conn.executemany("INSERT INTO edges VALUES (?, ?, ?, ?)", edges)
+            index.conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('source_dir', str(analyzer.source_dir)),
+                ('built_at', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            ])
+        return index
+
+    def close(self):
+        self.conn.close()
+
+    def _node_id(self, name):
+        row = self.conn.execute("SELECT id FROM nodes WHERE name = ?", (group_name(name),)).fetchone()
+        return row[0] if row else None
+
+    def _walk(self, name, reverse, kinds=None, transitive=True):
+        """Return node names reachable from name along (or against) edges of the given kinds."""
+        start = self._node_id(name)
+        if start is None:
+            return []
+        near, far = ('source', 'target') if reverse else ('target', 'source')
+        kind_filter, params = '', [start]
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params += list(kinds)
+        if not transitive:
+            rows = self.conn.execute(
+                f"SELECT DISTINCT n.name FROM edges e JOIN nodes n ON n.id = e.{near} "
+                f"WHERE e.{far} = ?{kind_filter} ORDER BY n.name",
+                params
+            )
+            return [row[0] for row in rows]
+        rows = self.conn.execute(
+            f"""
+            WITH RECURSIVE reach(id) AS (
+                SELECT {near} FROM edges WHERE {far} = ?{kind_filter}
+                UNION
+                SELECT e.{near} FROM edges e JOIN reach r ON e.{far} = r.id
+                WHERE 1 = 1{kind_filter}
+            )
+            SELECT n.name FROM reach JOIN nodes n ON n.id = reach.id
+            WHERE reach.id != ? ORDER BY n.name
+            """,
+            params + list(kinds or ()) + [start]
+        )
+        return [row[0] for row in rows]
+
+    def upstream(self, name, kinds=None):
+        """Everything that transitively reaches name, e.g. upstream('DB: CUSTOMER')."""
+        return self._walk(name, reverse=True, kinds=kinds)
+
+    def downstream(self, name, kinds=None):
+        """Everything name transitively depends on."""
+        return self._walk(name, reverse=False, kinds=kinds)
+
+    def callers(self, program, transitive=False):
+        """Programs and jobs that CALL or EXEC the given program."""
+        return self._walk(program, reverse=True, kinds=('call', 'exec'), transitive=transitive)
+
+    def table_access(self, table):
+        """Return [(module, query_type)] for direct accesses to a DB table."""
+        table_id = self._node_id(table if table.startswith('DB: ') else f"DB: {table}")
+        rows = self.conn.execute(
+            "SELECT n.name, e.detail FROM edges e JOIN nodes n ON n.id = e.source "
+            "WHERE e.target = ? AND e.kind = 'db' ORDER BY n.name, e.detail",
+            (table_id,)
+        )
+        return rows.fetchall()
+
 
 if __name__ == "__main__":
+    INDEX_FILE = "mainframe_dfd_index.db"
     st.title("IBM Mainframe Application Analysis")
     source_directory = st.text_input("Enter Source Directory Path:", "./mainframe_project")
+    view = st.radio("Diagram View", ["Full graph", "Collapsed by program/job"])
+    focus_module = st.text_input("Focus Module (optional):", "")
+    focus_hops = st.slider("Neighbourhood Hops", min_value=1, max_value=5, value=2)
     
     if st.button("Analyze Project"):
-        analyzer = MainframeDFDAnalyzer(source_directory)
+        analyzer = MainframeDFDAnalyzer(source_directory, cache_file="mainframe_dfd_cache.json")
         analyzer.analyze_project()
+        analyzer.save_index(INDEX_FILE).close()
+        # Kept across reruns, so changing the view or focus redraws without re-analyzing
+        st.session_state['mainframe_analysis'] = (analyzer, analyzer.demographic_lineage())
+
+    if 'mainframe_analysis' in st.session_state:
+        analyzer, lineage = st.session_state['mainframe_analysis']
         
         st.subheader("Dependency Report")
         st.text(analyzer.generate_dependency_report())
         
         st.subheader("Data Flow Diagram")
-        analyzer.visualize_dfd()
+        analyzer.visualize_dfd(
+            mode='collapsed' if view == "Collapsed by program/job" else 'full',
+            focus=focus_module.strip() or None,
+            hops=focus_hops
+        )
+
+        st.subheader("Demographic Field Lineage")
+        if lineage:
+            st.dataframe([
+                {'Module': module, 'Copybook': field['copybook'], 'Field': field['name'],
+                 'Level': field['level'], 'Picture': field['picture'], 'Data Type': field['data_type']}
+                for module, fields in lineage.items() for field in fields
+            ])
+        else:
+            st.info("No demographic fields found in included copybooks.")
+        if analyzer.copybooks.cycles:
+            st.warning("Copybook include cycles: " + "; ".join(" -> ".join(cycle) for cycle in analyzer.copybooks.cycles))
+
+    # Impact analysis reads the saved index, so it works without re-analyzing
+    if os.path.exists(INDEX_FILE):
+        st.subheader("Impact Analysis")
+        query_name = st.text_input("Program, Job or DB Table (e.g. DB: CUSTOMER):", "")
+        query_type = st.radio("Query", ["Everything that reaches it", "Everything it depends on", "Callers"])
+        if query_name.strip():
+            index = DependencyIndex(INDEX_FILE)
+            try:
+                if query_type == "Everything that reaches it":
+                    matches = index.upstream(query_name.strip())
+                elif query_type == "Everything it depends on":
+                    matches = index.downstream(query_name.strip())
+                else:
+                    matches = index.callers(query_name.strip(), transitive=True)
+            finally:
+                index.close()
+            st.text("\n".join(matches) if matches else "No matching modules found.")
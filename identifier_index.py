@@ -0,0 +1,126 @@
+"""
+Identifier extraction for the code scanner's identifier-index mode.
+
+Instead of matching every raw line, Python and Java files are parsed once and
+reduced to the names that can carry demographic data or integration hints:
+declared variables, fields, parameters, methods and classes, member accesses,
+annotations/decorators and string literals. Comments, docstrings and local
+variable reads are left out. Each distinct name is matched once, however many
+lines it appears on.
+
+Python uses the standard ast module. Java uses a lightweight tokenizer: an
+identifier counts as declared when it directly follows a type (an identifier,
+a primitive keyword, '>' or ']'), which covers fields, locals, parameters and
+method names without a full grammar.
+"""
+import ast
+import re
+from typing import Dict, List, Set
+
+# Java keywords that cannot be the type in front of a declaration
+JAVA_NON_TYPES = frozenset((
+    'abstract', 'assert', 'break', 'case', 'catch', 'continue', 'default', 'do', 'else', 'extends',
+    'final', 'finally', 'for', 'goto', 'if', 'implements', 'import', 'instanceof', 'native', 'new',
+    'package', 'private', 'protected', 'public', 'return', 'static', 'strictfp', 'super', 'switch',
+    'synchronized', 'this', 'throw', 'throws', 'transient', 'try', 'volatile', 'while', 'yield',
+    'true', 'false', 'null'
+))
+JAVA_TOKEN = re.compile(
+    r'(?P<comment>//[^\n]*|/\*.*?\*/)'
+    r'|(?P<string>"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*")'
+    r'|(?P<char>\'(?:\\.|[^\'\\\n])*\')'
+    r'|(?P<annotation>@\s*[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)'
+    r'|(?P<identifier>[A-Za-z_$][\w$]*)'
+    r'|(?P<newline>\n)'
+    r'|(?P<symbol>[^\s\w$])',
+    re.DOTALL
+)
+
+
+def _add(index: Dict[str, Set[int]], name: str, line: int):
+    if name:
+        index.setdefault(name, set()).add(line)
+
+
+def python_identifiers(text: str) -> Dict[str, Set[int]]:
+    """Map each declared name, attribute, decorator and string literal to its line numbers"""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+
+    # Bare string expressions are docstrings or commented-out code
+    docstrings = {
+        id(node.value) for node in ast.walk(tree)
+        if isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant)
+    }
+    index = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            _add(index, node.id, node.lineno)
+        elif isinstance(node, ast.Attribute):
+            _add(index, node.attr, node.end_lineno)
+        elif isinstance(node, ast.arg):
+            _add(index, node.arg, node.lineno)
+        elif isinstance(node, ast.keyword) and node.arg:
+            _add(index, node.arg, node.lineno)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            _add(index, node.name, node.lineno)
+            for decorator in node.decorator_list:
+                target = decorator.func if isinstance(decorator, ast.Call) else decorator
+                _add(index, '@' + ast.unparse(target), decorator.lineno)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in docstrings:
+            _add(index, node.value, node.lineno)
+    return index
+
+
+def java_identifiers(text: str) -> Dict[str, Set[int]]:
+    """Map each declared name, member access, annotation and string literal to its line numbers"""
+    index = {}
+    line = 1
+    previous = None
+    in_import = False
+    for token in JAVA_TOKEN.finditer(text):
+        kind = token.lastgroup
+        value = token.group()
+        if kind == 'newline':
+            line += 1
+            continue
+        # Package and import statements name libraries, not data
+        if in_import or value in ('import', 'package'):
+            in_import = value != ';'
+        elif kind == 'identifier':
+            declared = previous is not None and (
+                previous in ('>', ']', '.') or
+                (previous[0].isalpha() or previous[0] in '_$') and previous not in JAVA_NON_TYPES
+            )
+            if declared:
+                _add(index, value, line)
+        elif kind == 'annotation':
+            _add(index, re.sub(r'\s+', '', value), line)
+        elif kind == 'string':
+            _add(index, value.strip('"'), line)
+        if kind != 'comment':
+            previous = value
+        line += value.count('\n')
+    return index
+
+
+# Language name (as in CodeAnalyzer.supported_extensions) -> extractor
+IDENTIFIER_EXTRACTORS = {
+    'Python': python_identifiers,
+    'Java': java_identifiers,
+}
+
+
+def index_identifiers(text: str, language: str) -> Dict[str, List[int]]:
+    """
+    Return {identifier or literal: sorted line numbers} for a supported
+    language, or None when the language is unsupported or the source cannot
+    be parsed.
+    """
+    extractor = IDENTIFIER_EXTRACTORS.get(language)
+    index = extractor(text) if extractor else None
+    if index is None:
+        return None
+    return {name: sorted(lines) for name, lines in index.items()}
@@ -0,0 +1,458 @@
+"""
+Pattern packs: demographic fields, integration patterns and file fingerprints
+loaded from YAML or JSON, so clients can extend the scan without code changes.
+
+A pack looks like:
+
+    name: acme
+    languages: ['.java']          # optional; the pack then only applies to these extensions
+    demographic:
+      identity: '\\b(ssn|tax_id)\\b'                 # a regular expression, or
+      account: {fields: [acct_no, account_number]}   # a literal field list
+    integration:
+      messaging:
+        ibm_mq: 'MQQueueManager|MQMessage'
+    fingerprints:
+      spring_boot: '@SpringBootApplication'
+
+Field lists are turned into one word-boundary alternation. Each pack is
+validated and prepared once, then cached on disk as JSON by content hash, so
+packs with thousands of field names are not re-parsed and re-sorted on every
+load. The cache holds regex sources only; PatternMatcher compiles them once
+per file extension in each process.
+
+Demographic patterns that are plain literal alternations of at least
+KEYWORD_INDEX_MIN_TERMS terms (large pack field lists; none of the built-in
+patterns are that large) are matched by a KeywordIndex instead of the regex
+engine, so per-line cost does not grow with the size of the dictionary.
+"""
+import os
+import re
+import json
+import hashlib
+from collections import deque
+from typing import Dict, List, Set, Tuple
+
+try:
+    import re._parser as _regex_parser
+    import re._constants as _regex_constants
+except ImportError:  # Python < 3.11
+    import sre_parse as _regex_parser
+    import sre_constants as _regex_constants
+
+PACK_CACHE_DIR = '.codelens_pack_cache'
+# Bump when the prepared-pack layout changes so stale cache files are ignored
+PACK_CACHE_VERSION = 2
+
+# Literal alternations with fewer terms than this stay on the regex engine, which
+# is as fast as tokenizing for a handful of alternatives
+KEYWORD_INDEX_MIN_TERMS = 200
+WORD_PATTERN = re.compile(r'\w+')
+WORD_TERM = re.compile(r'\w+\Z')
+WORD_CHAR = re.compile(r'\w')
+LITERAL_ALTERNATION = re.compile(r'\\b\((?:\?:)?(.*)\)\\b\Z', re.DOTALL)
+REGEX_METACHARACTERS = frozenset('.^$*+?{}[]()')
+
+
+class PatternPackError(ValueError):
+    """Raised when a pattern pack cannot be read or is malformed"""
+
+
+def literal_alternatives(pattern: str) -> List[str]:
+    """
+    Return the terms of a pattern shaped like \\b(term|term|...)\\b whose terms
+    are plain literals, or None for anything that needs the regex engine.
+    """
+    match = LITERAL_ALTERNATION.match(pattern)
+    if not match:
+        return None
+    terms, current = [], []
+    body = match.group(1)
+    index = 0
+    while index < len(body):
+        char = body[index]
+        if char == '\\':
+            # Only escaped punctuation is literal; \d, \s and friends are classes
+            if index + 1 == len(body) or body[index + 1].isalnum():
+                return None
+            current.append(body[index + 1])
+            index += 2
+            continue
+        if char == '|':
+            terms.append(''.join(current))
+            current = []
+        elif char in REGEX_METACHARACTERS:
+            return None
+        else:
+            current.append(char)
+        index += 1
+    terms.append(''.join(current))
+    return terms if all(terms) else None
+
+
+def _required_in(items) -> List[Set[str]]:
+    """
+    Literal sets required by a parsed regex sequence: every match contains at
+    least one literal from each set. Whitespace ends a literal run so masked
+    text, where comments become spaces, never gains a literal the original lacked.
+    """
+    constants = _regex_constants
+    clauses, run = [], []
+
+    def close_run():
+        if run:
+            clauses.append({''.join(run)})
+            run.clear()
+
+    for op, arg in items:
+        if op is constants.LITERAL and arg < 128 and not chr(arg).isspace():
+            run.append(chr(arg).lower())
+            continue
+        close_run()
+        if op is constants.SUBPATTERN:
+            clauses.extend(_required_in(arg[-1]))
+        elif op is constants.BRANCH:
+            # Each alternative contributes its most selective set; one unknown alternative spoils the lot
+            alternatives = [_required_in(branch) for branch in arg[1]]
+            if all(alternatives):
+                clauses.append(set().union(*(_most_selective(alt) for alt in alternatives)))
+        elif op in (constants.MAX_REPEAT, constants.MIN_REPEAT) and arg[0] >= 1:
+            clauses.extend(_required_in(arg[2]))
+    close_run()
+    return clauses
+
+
+def _most_selective(clauses: List[Set[str]]) -> Set[str]:
+    # The set whose shortest literal is longest rules out the most text
+    return max(clauses, key=lambda literals: min(map(len, literals)))
+
+
+def required_literals(pattern: str) -> List[Set[str]]:
+    """
+    Return lowercase literal sets such that any text the pattern matches
+    case-insensitively contains a literal from each set, or None when nothing
+    is known about the pattern.
+    """
+    try:
+        return _required_in(_regex_parser.parse(pattern, re.IGNORECASE)) or None
+    except Exception:
+        return None
+
+
+class KeywordIndex:
+    """
+    Case-insensitive literal keyword matcher with regex \\b semantics, shared by
+    several data types. Whole-word terms are found with one tokenizing pass and
+    dict lookups; terms containing punctuation or spaces go through an
+    Aho-Corasick automaton. Either way the per-line cost is independent of
+    the number of terms.
+    """
+    def __init__(self):
+        self.words = {}      # lower-cased word -> [(slot, rank)]
+        self.goto = [{}]     # Aho-Corasick trie over lower-cased phrases
+        self.fail = [0]
+        self.output = [[]]   # node -> [(length, slot, rank)]
+        self.slots = 0
+
+    def add(self, terms: List[str]) -> int:
+        """Register one data type's terms; returns its slot. Rank is the alternation order."""
+        slot = self.slots
+        self.slots += 1
+        for rank, term in enumerate(terms):
+            lowered = term.lower()
+            if WORD_TERM.match(lowered):
+                self.words.setdefault(lowered, []).append((slot, rank))
+                continue
+            node = 0
+            for char in lowered:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = next_node
+            self.output[node].append((len(lowered), slot, rank))
+        return slot
+
+    def build(self):
+        """Compute failure links once all terms are added"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+        return self
+
+    def find(self, line: str) -> Dict[int, List[Tuple[int, int]]]:
+        """
+        Return slot -> [(start, end)] for one line, leftmost first and without
+        overlaps, exactly as finditer on the slot's alternation would.
+        Returns None when lower-casing changes the line length (rare non-ASCII
+        case foldings); callers then fall back to the regex.
+        """
+        lowered = line.lower()
+        if len(lowered) != len(line):
+            return None
+
+        candidates = {}
+        words = self.words
+        for token in WORD_PATTERN.finditer(lowered):
+            hits = words.get(token.group())
+            if hits:
+                for slot, rank in hits:
+                    candidates.setdefault(slot, []).append((token.start(), rank, token.end()))
+
+        if len(self.goto) > 1:
+            goto, fail, output = self.goto, self.fail, self.output
+            node = 0
+            for position, char in enumerate(lowered):
+                while node and char not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(char, 0)
+                for length, slot, rank in output[node]:
+                    end = position + 1
+                    start = end - length
+                    if _is_boundary(lowered, start) and _is_boundary(lowered, end):
+                        candidates.setdefault(slot, []).append((start, rank, end))
+
+        spans = {}
+        for slot, found in candidates.items():
+            found.sort()
+            chosen = []
+            last_end = 0
+            for start, _, end in found:
+                if start >= last_end:
+                    chosen.append((start, end))
+                    last_end = end
+            spans[slot] = chosen
+        return spans
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    """Regex \\b at index: exactly one side is a word character"""
+    before = index > 0 and WORD_CHAR.match(text, index - 1) is not None
+    after = WORD_CHAR.match(text, index) is not None
+    return before != after
+
+
+class PatternMatcher:
+    """Precompiled demographic, integration and fingerprint patterns for one file type"""
+    __slots__ = ('demographic', 'integration', 'fingerprints', 'keywords', 'prefilter')
+
+    def __init__(self, demographic: Dict, integration: Dict, fingerprints: Dict):
+        # [(data_type, compiled, keyword slot or None)], [(category, sub_type, compiled)], [(name, compiled)]
+        # The compiled regex is kept for keyword types too, as the fallback
+        keywords = KeywordIndex()
+        self.demographic = []
+        for data_type, pattern in demographic.items():
+            terms = literal_alternatives(pattern)
+            slot = keywords.add(terms) if terms and len(terms) >= KEYWORD_INDEX_MIN_TERMS else None
+            self.demographic.append((data_type, re.compile(pattern, re.IGNORECASE), slot))
+        self.keywords = keywords.build() if keywords.slots else None
+        self.integration = [
+            (category, sub_type, re.compile(pattern, re.IGNORECASE))
+            for category, sub_patterns in integration.items()
+            for sub_type, pattern in sub_patterns.items()
+        ]
+        self.fingerprints = [
+            (name, re.compile(pattern, re.IGNORECASE)) for name, pattern in fingerprints.items()
+        ]
+
+        # Per pattern, literal sets that any matching line must hit (lowercased), so
+        # may_match can rule out a whole file with substring tests. Patterns without
+        # such literals fall back to a whole-file regex search.
+        self.prefilter = []
+        for _, compiled, slot in self.demographic:
+            if slot is None:
+                self._add_prefilter(compiled.pattern)
+        for _, _, compiled in self.integration:
+            self._add_prefilter(compiled.pattern)
+
+    def _add_prefilter(self, pattern: str):
+        if self.prefilter is None:
+            return
+        clauses = required_literals(pattern)
+        if clauses is not None:
+            self.prefilter.append(tuple(tuple(clause) for clause in clauses))
+        elif any(marker in pattern for marker in ('\\A', '\\Z', '(?<')):
+            # Text-edge anchors and lookbehinds see across lines in the joined file
+            self.prefilter = None
+        else:
+            self.prefilter.append(re.compile(pattern, re.IGNORECASE | re.MULTILINE))
+
+    def may_match(self, text: str) -> bool:
+        """
+        Cheap whole-file check: False only when no demographic or integration
+        pattern can match any line of text.
+        """
+        # Case-insensitive matching folds some non-ASCII letters onto ASCII ones
+        if self.prefilter is None or not text.isascii():
+            return True
+        lowered = text.lower()
+        for check in self.prefilter:
+            if isinstance(check, tuple):
+                if all(any(literal in lowered for literal in clause) for clause in check):
+                    return True
+            elif check.search(text):
+                return True
+        if self.keywords is not None:
+            spans = self.keywords.find(text)
+            return spans is None or any(spans.values())
+        return False
+
+
+def field_list_pattern(fields: List[str]) -> str:
+    """Build a word-boundary alternation from literal field names"""
+    # Longest first so a field is never shadowed by one of its own prefixes
+    unique = sorted({str(field).strip() for field in fields if str(field).strip()}, key=lambda f: (-len(f), f))
+    if not unique:
+        raise ValueError("field list is empty")
+    return r'\b(' + '|'.join(re.escape(field) for field in unique) + r')\b'
+
+
+def _parse_pack(path: str, raw: bytes) -> Dict:
+    try:
+        if path.lower().endswith(('.yaml', '.yml')):
+            import yaml
+            data = yaml.safe_load(raw)
+        else:
+            data = json.loads(raw)
+    except ImportError:
+        raise PatternPackError(f"{path}: PyYAML is required for YAML packs (pip install pyyaml)")
+    except Exception as e:
+        raise PatternPackError(f"{path}: {str(e)}")
+    if not isinstance(data, dict):
+        raise PatternPackError(f"{path}: a pack must be a mapping")
+    return data
+
+
+def _check_pattern(path: str, label: str, pattern: str) -> str:
+    try:
+        re.compile(pattern, re.IGNORECASE)
+    except (re.error, TypeError) as e:
+        raise PatternPackError(f"{path}: invalid pattern for {label}: {str(e)}")
+    return pattern
+
+
+def _section(path: str, data: Dict, key: str) -> Dict:
+    section = data.get(key) or {}
+    if not isinstance(section, dict):
+        raise PatternPackError(f"{path}: {key} must be a mapping")
+    return section
+
+
+def prepare_pack(path: str, data: Dict) -> Dict:
+    """Validate a raw pack and normalise it to plain regex sources"""
+    languages = data.get('languages') or []
+    if not isinstance(languages, list) or not all(isinstance(ext, str) and ext for ext in languages):
+        raise PatternPackError(f"{path}: languages must be a list of file extensions")
+    name = data.get('name') or os.path.splitext(os.path.basename(path))[0]
+    if not isinstance(name, str):
+        raise PatternPackError(f"{path}: name must be a string")
+
+    prepared = {
+        'name': name,
+        'languages': sorted(ext.lower() if ext.startswith('.') else f".{ext.lower()}" for ext in languages),
+        'demographic': {},
+        'integration': {},
+        'fingerprints': {}
+    }
+
+    for data_type, spec in _section(path, data, 'demographic').items():
+        if isinstance(spec, dict):
+            spec = spec.get('fields')
+            if not isinstance(spec, list):
+                raise PatternPackError(f"{path}: demographic.{data_type}.fields must be a list")
+        if isinstance(spec, list):
+            try:
+                spec = field_list_pattern(spec)
+            except ValueError as e:
+                raise PatternPackError(f"{path}: demographic.{data_type}: {str(e)}")
+        prepared['demographic'][str(data_type)] = _check_pattern(path, f"demographic.{data_type}", spec)
+
+    for category, sub_patterns in _section(path, data, 'integration').items():
+        if not isinstance(sub_patterns, dict):
+            raise PatternPackError(f"{path}: integration.{category} must map sub types to patterns")
+        prepared['integration'][str(category)] = {
+            str(sub_type): _check_pattern(path, f"integration.{category}.{sub_type}", pattern)
+            for sub_type, pattern in sub_patterns.items()
+        }
+
+    for name, pattern in _section(path, data, 'fingerprints').items():
+        prepared['fingerprints'][str(name)] = _check_pattern(path, f"fingerprints.{name}", pattern)
+
+    return prepared
+
+
+def _is_prepared(pack) -> bool:
+    """Shape check for a cached prepared pack; anything else is rebuilt from the source file"""
+    def patterns(mapping):
+        return isinstance(mapping, dict) and all(isinstance(value, str) for value in mapping.values())
+
+    return (
+        isinstance(pack, dict)
+        and isinstance(pack.get('name'), str)
+        and isinstance(pack.get('languages'), list)
+        and patterns(pack.get('demographic'))
+        and patterns(pack.get('fingerprints'))
+        and isinstance(pack.get('integration'), dict)
+        and all(patterns(sub_patterns) for sub_patterns in pack['integration'].values())
+    )
+
+
+def load_pack(path: str, cache_dir: str = PACK_CACHE_DIR) -> Dict:
+    """
+    Load a YAML or JSON pattern pack, reusing the prepared form cached under
+    cache_dir when the file content has not changed.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw).hexdigest()
+    # Plain JSON, so a planted cache file can at worst supply patterns, never code
+    cache_path = os.path.join(cache_dir, f"{digest}.json") if cache_dir else None
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if isinstance(cached, dict) and cached.get('version') == PACK_CACHE_VERSION and _is_prepared(cached.get('pack')):
+                return cached['pack']
+        except (OSError, ValueError):
+            pass
+
+    pack = prepare_pack(path, _parse_pack(path, raw))
+    pack['digest'] = digest
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': PACK_CACHE_VERSION, 'pack': pack}, f)
+        except OSError:
+            pass
+    return pack
+
+
+def merge_packs(demographic: Dict, integration: Dict, packs: List[Dict], extension: str = None) -> Tuple[Dict, Dict, Dict]:
+    """
+    Layer packs over the base patterns, in order. Packs restricted to languages
+    only apply when extension is one of them; later packs win on the same key.
+    """
+    demographic = dict(demographic)
+    integration = {category: dict(sub_patterns) for category, sub_patterns in integration.items()}
+    fingerprints = {}
+    for pack in packs:
+        if pack['languages'] and extension not in pack['languages']:
+            continue
+        demographic.update(pack['demographic'])
+        for category, sub_patterns in pack['integration'].items():
+            integration.setdefault(category, {}).update(sub_patterns)
+        fingerprints.update(pack['fingerprints'])
+    return demographic, integration, fingerprints
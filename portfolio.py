@@ -0,0 +1,316 @@
+"""
+Portfolio scans: many applications in one run.
+
+A manifest lists application names and repository paths. Every application's
+files are scheduled onto one shared worker pool, largest first and grouped
+into batches of similar total size, so one big repository does not leave the
+other workers idle and small repositories do not each pay for their own pool.
+Each application still gets the usual scan_repository-shaped results (and
+HTML report), plus a portfolio rollup across all of them.
+
+A manifest is JSON, YAML or CSV:
+
+    [{"name": "billing", "path": "/src/billing"}, {"name": "crm", "path": "/src/crm"}]
+
+    name,path
+    billing,/src/billing
+
+    python portfolio.py manifest.json --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from codescan import CodeAnalyzer, ScanMetrics, analyze_encrypted_content
+from pattern_packs import load_pack
+
+# Files are sent to workers in batches of at most about this many bytes; larger files go alone
+BATCH_BYTES = 1024 * 1024
+
+
+class ManifestError(ValueError):
+    """Raised when a portfolio manifest cannot be read or is malformed"""
+
+
+def load_manifest(path: str) -> List[Tuple[str, str]]:
+    """Read [(app_name, repo_path)] from a JSON, YAML or CSV manifest"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.lower().endswith('.csv'):
+                entries = list(csv.DictReader(f))
+            elif path.lower().endswith(('.yaml', '.yml')):
+                import yaml
+                entries = yaml.safe_load(f)
+            else:
+                entries = json.load(f)
+    except (OSError, ValueError, ImportError) as e:
+        raise ManifestError(f"{path}: {str(e)}")
+
+    # {"billing": "/src/billing", ...} is accepted as a shorthand
+    if isinstance(entries, dict):
+        entries = [{'name': name, 'path': repo} for name, repo in entries.items()]
+    if not isinstance(entries, list) or not entries:
+        raise ManifestError(f"{path}: expected a non-empty list of applications")
+
+    apps, seen = [], set()
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get('name') or not entry.get('path'):
+            raise ManifestError(f"{path}: every application needs a name and a path")
+        name = str(entry['name']).strip()
+        if name in seen:
+            raise ManifestError(f"{path}: duplicate application name '{name}'")
+        seen.add(name)
+        apps.append((name, str(entry['path']).strip()))
+    return apps
+
+
+def size_balanced_batches(jobs: List[Tuple[int, int, Path]], batch_bytes: int = BATCH_BYTES) -> List[List]:
+    """
+    Group (size, app_index, file_path) jobs into batches of about batch_bytes,
+    largest files first, so the pool drains evenly
+    """
+    batches, current, current_bytes = [], [], 0
+    for size, app_index, file_path in sorted(jobs, key=lambda job: -job[0]):
+        if current and current_bytes + size > batch_bytes:
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append((app_index, file_path))
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+# Per-process state for portfolio workers, set by _init_portfolio_worker
+_worker_analyzers = None
+_worker_keys = {}
+
+
+def _init_portfolio_worker(analyzers: List[CodeAnalyzer]):
+    """Give each worker process one copy of every application's analyzer"""
+    global _worker_analyzers, _worker_keys
+    _worker_analyzers = analyzers
+    _worker_keys = {}
+
+
+def _analyze_batch(batch: List[Tuple[int, Path]]) -> List[Tuple[int, Path, Dict]]:
+    """Analyze a batch of (app_index, file_path) jobs; plaintext of encrypted files stays in memory"""
+    results = []
+    for app_index, file_path in batch:
+        analyzer = _worker_analyzers[app_index]
+        try:
+            if file_path.suffix == '.enc':
+                keys = _worker_keys.get(analyzer.decryption_key)
+                if keys is None:
+                    from encrypt_decrypt_java import PassphraseKeys
+                    keys = _worker_keys[analyzer.decryption_key] = PassphraseKeys(analyzer.decryption_key)
+                file_results = analyze_encrypted_content(analyzer, keys, file_path)
+            else:
+                file_results = analyzer.analyze_file(file_path)
+        except Exception as e:
+            # One unreadable file is recorded against its application instead of ending the run
+            analyzer.logger.error(f"Error analyzing file {file_path}: {str(e)}")
+            file_results = {'demographic_data': {}, 'integration_patterns': [], 'error': str(e)}
+        results.append((app_index, file_path, file_results))
+    return results
+
+
+class PortfolioAnalyzer:
+    def __init__(self, applications: List[Tuple[str, str]], workers: int = None, app_reports: bool = True,
+                 batch_bytes: int = BATCH_BYTES, **analyzer_options):
+        """
+        applications is [(app_name, repo_path)]; analyzer_options are passed to
+        every CodeAnalyzer (decryption_key, pattern_packs, language_aware, ...)
+        """
+        # Every analyzer has the same options, so packs are loaded once and compiled matchers
+        # are shared (and pickled once per worker) instead of being rebuilt per application
+        packs = [load_pack(path) for path in analyzer_options.pop('pattern_packs', None) or []]
+        matchers = {}
+        self.analyzers = [
+            CodeAnalyzer(repo_path, app_name, pattern_packs=packs, matchers=matchers, **analyzer_options)
+            for app_name, repo_path in applications
+        ]
+        self.logger = self.analyzers[0].logger if self.analyzers else None
+        self.workers = workers
+        # Write each application's HTML report as scan_repository would
+        self.app_reports = app_reports
+        self.batch_bytes = batch_bytes
+
+    def scan_portfolio(self) -> Dict:
+        """Scan every application on one shared pool; returns per-app results and a rollup"""
+        started = datetime.now()
+        applications = []
+        jobs = []
+        # app_index -> error for applications that could not be scanned or reported
+        failed = {}
+        for app_index, analyzer in enumerate(self.analyzers):
+            analyzer.metrics = ScanMetrics() if analyzer.instrument else None
+            applications.append(analyzer.new_results())
+            applications[app_index]['summary']['failed_files'] = []
+            if not analyzer.repo_path.is_dir():
+                failed[app_index] = f"repository path not found: {analyzer.repo_path}"
+                self.logger.error(f"Skipping {analyzer.app_name}: {failed[app_index]}")
+                continue
+            for file_path in analyzer.get_code_files():
+                try:
+                    size = file_path.stat().st_size
+                except OSError:
+                    size = 0
+                jobs.append((size, app_index, file_path))
+
+        # Small portfolios get smaller batches so every worker has several to draw from
+        workers = self.workers or os.cpu_count() or 1
+        total_bytes = sum(size for size, _, _ in jobs)
+        batches = size_balanced_batches(jobs, max(1, min(self.batch_bytes, total_bytes // (workers * 4))))
+        self.logger.info(
+            f"Portfolio scan: {len(self.analyzers)} applications, {len(jobs)} files in {len(batches)} batches"
+        )
+        for app_index, file_path, file_results in self._run_batches(batches):
+            if 'error' in file_results:
+                applications[app_index]['summary']['failed_files'].append(
+                    {'file_path': str(file_path), 'error': file_results['error']}
+                )
+                continue
+            analyzer = self.analyzers[app_index]
+            analyzer.update_results(applications[app_index], file_results, file_path)
+            applications[app_index]['summary']['files_analyzed'] += 1
+
+        results = {}
+        for app_index, (analyzer, app_results) in enumerate(zip(self.analyzers, applications)):
+            if app_index in failed:
+                continue
+            if analyzer.metrics is not None:
+                app_results['metadata']['performance'] = analyzer.metrics.as_dict()
+            try:
+                if self.app_reports:
+                    analyzer.generate_report(app_results)
+                else:
+                    app_results['summary']['unique_demographic_fields'] = list(app_results['summary']['unique_demographic_fields'])
+            except OSError as e:
+                failed[app_index] = f"report could not be written: {str(e)}"
+                self.logger.error(f"Skipping {analyzer.app_name}: {failed[app_index]}")
+                continue
+            results[analyzer.app_name] = app_results
+
+        failures = [
+            {
+                'application_name': self.analyzers[app_index].app_name,
+                'repository_path': str(self.analyzers[app_index].repo_path),
+                'error': error
+            }
+            for app_index, error in sorted(failed.items())
+        ]
+
+        return {
+            'metadata': {
+                'scan_timestamp': started.strftime('%Y-%m-%d %H:%M:%S'),
+                'duration_s': round((datetime.now() - started).total_seconds(), 3),
+                'applications': len(results),
+                'files_scheduled': len(jobs),
+                'batches': len(batches)
+            },
+            'applications': results,
+            'failures': failures,
+            'rollup': self.rollup(results, failures)
+        }
+
+    def _run_batches(self, batches: List[List]):
+        """Yield (app_index, file_path, file_results) from the shared pool, in-process if it fails"""
+        done = 0
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_portfolio_worker,
+                                     initargs=(self.analyzers,)) as executor:
+                for batch_results in executor.map(_analyze_batch, batches):
+                    yield from batch_results
+                    done += 1
+        except (BrokenProcessPool, OSError) as e:
+            self.logger.error(f"Portfolio workers failed ({str(e)}); scanning in-process")
+            _init_portfolio_worker(self.analyzers)
+            for batch in batches[done:]:
+                yield from _analyze_batch(batch)
+
+    def rollup(self, applications: Dict[str, Dict], failures: List[Dict] = None) -> Dict:
+        """Portfolio-wide totals, field spread across applications, per-app summaries and skipped applications"""
+        field_apps = {}
+        integration_types = {}
+        per_app = []
+        for app_name, app_results in applications.items():
+            summary = app_results['summary']
+            for field_name in summary['unique_demographic_fields']:
+                field_apps.setdefault(field_name, []).append(app_name)
+            for pattern in app_results['integration_patterns']:
+                counts = integration_types.setdefault(pattern['pattern_type'], {})
+                counts[app_name] = counts.get(app_name, 0) + 1
+            per_app.append({
+                'application_name': app_name,
+                'repository_path': app_results['metadata']['repository_path'],
+                'files_analyzed': summary['files_analyzed'],
+                'failed_files': summary.get('failed_files', []),
+                'unique_demographic_fields': len(summary['unique_demographic_fields']),
+                'demographic_fields_found': summary['demographic_fields_found'],
+                'integration_patterns_found': summary['integration_patterns_found']
+            })
+
+        return {
+            'files_analyzed': sum(app['files_analyzed'] for app in per_app),
+            'files_failed': sum(len(app['failed_files']) for app in per_app),
+            'demographic_fields_found': sum(app['demographic_fields_found'] for app in per_app),
+            'integration_patterns_found': sum(app['integration_patterns_found'] for app in per_app),
+            # Fields shared by the most applications first
+            'fields': dict(sorted(field_apps.items(), key=lambda item: (-len(item[1]), item[0]))),
+            'integration_types': integration_types,
+            'applications': per_app,
+            'failed_applications': failures or []
+        }
+
+    def write_rollup(self, portfolio: Dict, filename: str = None) -> str:
+        """Write the rollup and per-app summaries as JSON; returns the file name"""
+        filename = filename or f"Portfolio_CodeLens_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'metadata': portfolio['metadata'], 'rollup': portfolio['rollup']}, f, indent=2)
+        self.logger.info(f"Portfolio rollup written: {filename}")
+        return filename
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan a portfolio of applications listed in a manifest.")
+    parser.add_argument('manifest', help="JSON, YAML or CSV list of application names and paths")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--no-app-reports', action='store_true', help="skip the per-application HTML reports")
+    parser.add_argument('--output', default=None, help="rollup JSON file name")
+    parser.add_argument('--decryption-key', default=None, help="passphrase for .enc sources")
+    parser.add_argument('--report-encrypted-snippets', action='store_true',
+                        help="write code from .enc sources to the HTML reports instead of redacting it")
+    parser.add_argument('--pattern-pack', action='append', default=[], help="YAML/JSON pattern pack; repeatable")
+    args = parser.parse_args()
+
+    try:
+        portfolio = PortfolioAnalyzer(
+            load_manifest(args.manifest),
+            workers=args.workers,
+            app_reports=not args.no_app_reports,
+            decryption_key=args.decryption_key,
+            report_encrypted_snippets=args.report_encrypted_snippets,
+            pattern_packs=args.pattern_pack
+        )
+        results = portfolio.scan_portfolio()
+        filename = portfolio.write_rollup(results, args.output)
+        rollup = results['rollup']
+        print(f"Scanned {len(results['applications'])} applications, {rollup['files_analyzed']} files "
+              f"in {results['metadata']['duration_s']}s; rollup written to {filename}")
+        for failure in results['failures']:
+            print(f"Skipped {failure['application_name']}: {failure['error']}")
+        if rollup['files_failed']:
+            print(f"{rollup['files_failed']} files could not be analyzed; see the rollup for details")
+    except ManifestError as e:
+        print(f"Error reading manifest: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
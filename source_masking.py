@@ -0,0 +1,79 @@
+"""
+Language-aware noise masking for the code scanner.
+
+Comments, docstrings and long prose string literals are blanked out before
+pattern matching so license headers and log messages stop producing hits.
+Short strings (map keys, column names, URLs, connection strings) and strings
+that look like SQL are kept, since that is where real field and integration
+references live. Masked characters become spaces and newlines are kept, so
+line numbers and columns in the masked text match the original.
+
+Each language has a lightweight regex tokenizer; one finditer pass over the
+file is much cheaper than a full Pygments token stream.
+"""
+import re
+from typing import List
+
+# String literals up to this length are kept; longer ones are kept only if they look like SQL
+MAX_KEPT_STRING_LENGTH = 64
+SQL_STRING = re.compile(r'^\W*(select|insert|update|delete|merge|with|call|exec)\b', re.IGNORECASE)
+# String prefix (r, b, f, u, C# @) and opening quotes, removed before the SQL check
+STRING_OPENER = re.compile(r'^[rRbBuUfF@]{0,2}["\'`]+')
+
+_DOUBLE_QUOTED = r'"(?:\\.|[^"\\\n])*"'
+_SINGLE_QUOTED = r"'(?:\\.|[^'\\\n])*'"
+_C_COMMENTS = r'(?P<comment>//[^\n]*|/\*.*?\*/)'
+
+# Language name (as in CodeAnalyzer.supported_extensions) -> tokenizer with
+# 'comment' and 'string' groups; the leftmost match wins, so comment markers
+# inside strings and quotes inside comments are handled
+NOISE_TOKENIZERS = {
+    'Java': re.compile(_C_COMMENTS + r'|(?P<string>"""(?:\\.|[^\\])*?"""|' + _DOUBLE_QUOTED + '|' + _SINGLE_QUOTED + ')', re.DOTALL),
+    'JavaScript': re.compile(_C_COMMENTS + r'|(?P<string>`(?:\\.|[^`\\])*`|' + _DOUBLE_QUOTED + '|' + _SINGLE_QUOTED + ')', re.DOTALL),
+    'C#': re.compile(_C_COMMENTS + r'|(?P<string>@"(?:""|[^"])*"|' + _DOUBLE_QUOTED + '|' + _SINGLE_QUOTED + ')', re.DOTALL),
+    'PHP': re.compile(r'(?P<comment>//[^\n]*|#[^\n]*|/\*.*?\*/)|(?P<string>' + _DOUBLE_QUOTED + '|' + _SINGLE_QUOTED + ')', re.DOTALL),
+    'Python': re.compile(
+        r'(?P<comment>#[^\n]*)|(?P<string>[rRbBuUfF]{0,2}(?:"""(?:\\.|[^\\])*?"""|' + r"'''(?:\\.|[^\\])*?'''|"
+        + _DOUBLE_QUOTED + '|' + _SINGLE_QUOTED + '))',
+        re.DOTALL
+    ),
+    'Ruby': re.compile(r'(?P<comment>#[^\n]*|^=begin\b.*?^=end\b)|(?P<string>' + _DOUBLE_QUOTED + '|' + _SINGLE_QUOTED + ')', re.DOTALL | re.MULTILINE),
+    'XSD': re.compile(r'(?P<comment><!--.*?-->)', re.DOTALL),
+}
+NOISE_TOKENIZERS['TypeScript'] = NOISE_TOKENIZERS['JavaScript']
+
+
+def _blank(text: str) -> str:
+    """Replace everything but line breaks with spaces, keeping offsets intact"""
+    return re.sub(r'[^\r\n]', ' ', text)
+
+
+def mask_noise(text: str, language: str) -> str:
+    """Return text with comments and long non-SQL string literals blanked out"""
+    tokenizer = NOISE_TOKENIZERS.get(language)
+    if tokenizer is None:
+        return text
+
+    pieces = []
+    position = 0
+    for token in tokenizer.finditer(text):
+        literal = token.group('string') if 'string' in tokenizer.groupindex else None
+        if literal is not None and (len(literal) <= MAX_KEPT_STRING_LENGTH or SQL_STRING.match(STRING_OPENER.sub('', literal))):
+            continue
+        pieces.append(text[position:token.start()])
+        pieces.append(_blank(token.group()))
+        position = token.end()
+    if not pieces:
+        return text
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+
+def split_like(masked: str, lines: List[str]) -> List[str]:
+    """Split masked text at the same offsets as the original lines"""
+    result = []
+    offset = 0
+    for line in lines:
+        result.append(masked[offset:offset + len(line)])
+        offset += len(line)
+    return result
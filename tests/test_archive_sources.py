@@ -0,0 +1,26 @@
+import gzip
+import io
+import zipfile
+
+from archive_sources import iter_sources
+
+
+def test_gzipped_file_is_scanned_as_the_file_inside():
+    sources = [("Customer.py.gz", gzip.compress(b"email = 1\n")), ("notes.gz", gzip.compress(b"x"))]
+    assert list(iter_sources(sources, lambda path: path.endswith('.py'))) == [("Customer.py", b"email = 1\n")]
+
+
+def test_archive_members_are_checked_under_the_reported_path():
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zipped:
+        zipped.writestr("src/Customer.java", "String email;")
+        zipped.writestr("vendor/Lib.java", "String email;")
+    checked = []
+
+    def wanted(path):
+        checked.append(path)
+        return not path.startswith("upload.zip/vendor/")
+
+    members = list(iter_sources([("upload.zip", archive.getvalue())], wanted))
+    assert [name for name, _ in members] == ["upload.zip/src/Customer.java"]
+    assert checked == ["upload.zip/src/Customer.java", "upload.zip/vendor/Lib.java"]
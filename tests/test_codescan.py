@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from codescan import REDACTED_SNIPPET, CodeAnalyzer, plain_results
+
+
+@pytest.fixture
+def repo(tmp_path_factory, monkeypatch):
+    # tmp_path would be named after the test, and paths containing 'test_' are skipped
+    root = tmp_path_factory.mktemp("scan")
+    monkeypatch.chdir(root)
+    source = root / "repo"
+    source.mkdir()
+    (source / "Customer.java").write_text(
+        'class Customer {\n'
+        '    String firstName;\n'
+        '    String email = "a@b.c";\n'
+        '    RestTemplate client = new RestTemplate();\n'
+        '}\n'
+    )
+    return source
+
+
+def test_scan_results_are_store_views_with_a_plain_copy(repo):
+    results = CodeAnalyzer(str(repo), "app").scan_repository()
+    assert 'occurrence_store' in results
+
+    plain = plain_results(results)
+    assert 'occurrence_store' not in plain
+    assert isinstance(plain['demographic_data'], dict)
+    assert isinstance(plain['integration_patterns'], list)
+    json.dumps(plain)
+
+    occurrences = [
+        occurrence for fields in results['demographic_data'].values()
+        for data in fields.values() for occurrence in data['occurrences']
+    ]
+    assert occurrences and len(occurrences) == results['summary']['demographic_fields_found']
+    assert list(results['integration_patterns']) == plain['integration_patterns']
+    assert {
+        file_path: {name: dict(data, occurrences=list(data['occurrences'])) for name, data in fields.items()}
+        for file_path, fields in results['demographic_data'].items()
+    } == plain['demographic_data']
+
+
+def test_encrypted_file_with_wrong_key_does_not_stop_scan(repo):
+    from encrypt_decrypt_java import PassphraseKeys, encrypt_stream
+
+    for name, passphrase in (("Good.java", "right"), ("Bad.java", "wrong")):
+        with open(repo / "Customer.java", 'rb') as plain, open(repo / f"{name}.enc", 'wb') as encrypted:
+            encrypt_stream(plain, encrypted, PassphraseKeys(passphrase))
+    (repo / "Customer.java").unlink()
+
+    results = CodeAnalyzer(str(repo), "app", decryption_key="right").scan_repository()
+    assert results['summary']['files_analyzed'] == 2
+    assert list(results['demographic_data']) == [str(repo / "Good.java.enc")]
+
+
+def test_identifier_mode_with_instrumentation(repo):
+    (repo / "Client.java").write_text('class Client {\n    String url = "https://api.example.com/customers";\n}\n')
+    results = CodeAnalyzer(str(repo), "app", identifier_mode=True, instrument=True).scan_repository()
+    assert results['summary']['files_analyzed'] == 2
+    assert results['integration_patterns']
+    patterns = {entry['pattern']: entry['matches'] for entry in results['metadata']['performance']['patterns']}
+    for pattern in results['integration_patterns']:
+        assert patterns[f"{pattern['pattern_type']}.{pattern['sub_type']}"] >= 1
+
+
+@pytest.mark.parametrize("opt_in", [False, True])
+def test_report_redacts_code_from_encrypted_sources(repo, opt_in):
+    from encrypt_decrypt_java import PassphraseKeys, encrypt_stream
+
+    with open(repo / "Customer.java", 'rb') as plain, open(repo / "Secret.java.enc", 'wb') as encrypted:
+        encrypt_stream(plain, encrypted, PassphraseKeys("key"))
+    (repo / "Customer.java").unlink()
+
+    analyzer = CodeAnalyzer(str(repo), "enc", decryption_key="key", report_encrypted_snippets=opt_in)
+    results = analyzer.scan_repository()
+    assert results['summary']['demographic_fields_found']
+    report = next(repo.parent.glob("enc_CodeLens_*.html")).read_text()
+    assert ('String email = "a@b.c";' in report) == opt_in
+    assert (REDACTED_SNIPPET in report) != opt_in
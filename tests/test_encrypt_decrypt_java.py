@@ -0,0 +1,54 @@
+import io
+
+import pytest
+from cryptography.fernet import Fernet
+
+from encrypt_decrypt_java import (
+    CHUNK_SIZE, HEADER, SCRYPT_LOG2_N, SCRYPT_P, SCRYPT_R, STREAM_MAGIC, PassphraseKeys, decrypt_fileobj,
+    decrypt_stream, encrypt_stream
+)
+
+
+class CountingKeys(PassphraseKeys):
+    def __init__(self, passphrase):
+        super().__init__(passphrase)
+        self.derived = []
+
+    def derive(self, salt, *params):
+        self.derived.append(params)
+        return super().derive(salt, *params)
+
+
+def test_round_trip():
+    keys = PassphraseKeys("secret")
+    encrypted = io.BytesIO()
+    encrypt_stream(io.BytesIO(b"x" * (CHUNK_SIZE + 10)), encrypted, keys)
+    plaintext = io.BytesIO()
+    decrypt_stream(io.BytesIO(encrypted.getvalue()), plaintext, keys)
+    assert plaintext.getvalue() == b"x" * (CHUNK_SIZE + 10)
+
+
+@pytest.mark.parametrize("params", [
+    (CHUNK_SIZE, 30, SCRYPT_R, SCRYPT_P),
+    (CHUNK_SIZE, SCRYPT_LOG2_N, 255, SCRYPT_P),
+    (CHUNK_SIZE, SCRYPT_LOG2_N, SCRYPT_R, 16),
+    (0xFFFFFFFF, SCRYPT_LOG2_N, SCRYPT_R, SCRYPT_P),
+])
+def test_rejects_tampered_header_before_deriving(params):
+    chunk_size, log2_n, r, p = params
+    header = HEADER.pack(STREAM_MAGIC, chunk_size, b"\0" * 7, b"\0" * 16, log2_n, r, p)
+    keys = CountingKeys("secret")
+    with pytest.raises(ValueError):
+        decrypt_stream(io.BytesIO(header + b"\0" * 32), io.BytesIO(), keys)
+    assert keys.derived == []
+
+
+def test_only_current_streams_and_fernet_tokens_are_accepted():
+    keys = PassphraseKeys("secret")
+    token = Fernet(keys.legacy_key()).encrypt(b"class Legacy {}")
+    assert decrypt_fileobj(io.BytesIO(token), keys) == b"class Legacy {}"
+
+    # The pre-release v1 stream header, which used the padded passphrase as the AES key
+    v1_stream = b"ZCAENC\x00\x01" + CHUNK_SIZE.to_bytes(4, 'big') + b"\0" * 7 + b"\0" * 32
+    with pytest.raises(ValueError):
+        decrypt_stream(io.BytesIO(v1_stream), io.BytesIO(), keys)
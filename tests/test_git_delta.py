@@ -0,0 +1,110 @@
+import subprocess
+
+import pytest
+
+from git_delta import (GitDiffError, changed_files, diff_file_results, read_blobs, read_file_at,
+                       resolve_commit)
+
+
+def git(repo, *args):
+    subprocess.run(
+        ['git', '-C', str(repo), '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+        check=True, capture_output=True
+    )
+
+
+@pytest.fixture
+def history(tmp_path_factory):
+    """A repository whose second commit modifies, renames, adds and deletes one file each"""
+    repo = tmp_path_factory.mktemp("delta")
+    git(repo, 'init', '-q')
+    (repo / "src").mkdir()
+    (repo / "src" / "Customer.java").write_text('String email;\nString phone;\n')
+    (repo / "src" / "Old Name.java").write_text('class Moved {\n    String ssn;\n    int unchanged;\n}\n')
+    (repo / "Gone.java").write_text('String passport;\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-q', '-m', 'base')
+
+    (repo / "src" / "Customer.java").write_text('String email;\nString address;\n')
+    git(repo, 'mv', 'src/Old Name.java', 'src/New Name.java')
+    (repo / "Added.java").write_bytes(b'String city;\r\n\n')
+    git(repo, 'rm', '-q', 'Gone.java')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-q', '-m', 'head')
+    return repo, resolve_commit(repo, 'HEAD~1'), resolve_commit(repo, 'HEAD')
+
+
+def test_changed_files_lists_each_status_with_both_paths(history):
+    repo, base, head = history
+    assert sorted(changed_files(repo, base, head)) == [
+        ('A', 'Added.java', 'Added.java'),
+        ('D', 'Gone.java', 'Gone.java'),
+        ('M', 'src/Customer.java', 'src/Customer.java'),
+        ('R', 'src/Old Name.java', 'src/New Name.java'),
+    ]
+
+
+def test_changed_files_are_relative_to_a_subdirectory(history):
+    repo, base, head = history
+    assert sorted(changed_files(repo / "src", base, head)) == [
+        ('M', 'Customer.java', 'Customer.java'),
+        ('R', 'Old Name.java', 'New Name.java'),
+    ]
+
+
+def test_read_blobs_returns_exact_content_and_skips_missing(history):
+    repo, base, head = history
+    specs = [f"{head}:Added.java", f"{base}:Added.java", f"{base}:src/Customer.java", f"{head}:Gone.java"]
+    assert read_blobs(repo, specs) == {
+        f"{head}:Added.java": b'String city;\r\n\n',
+        f"{base}:src/Customer.java": b'String email;\nString phone;\n',
+    }
+
+
+def test_read_file_at_takes_absolute_paths(history):
+    repo, base, head = history
+    assert read_file_at(repo, base, repo / "Gone.java") == b'String passport;\n'
+    with pytest.raises(FileNotFoundError):
+        read_file_at(repo, head, repo / "Gone.java")
+
+
+def test_resolve_commit_rejects_unknown_refs(history):
+    repo, _, _ = history
+    with pytest.raises(GitDiffError):
+        resolve_commit(repo, 'no-such-branch')
+
+
+def test_diff_file_results_ignores_moved_lines():
+    def results(*hits):
+        return {
+            'demographic_data': {'f': {
+                field: {'data_type': 'contact', 'occurrences': [{'line_number': line, 'code_snippet': snippet}]}
+                for field, line, snippet in hits
+            }},
+            'integration_patterns': []
+        }
+
+    base = results(('email', 1, 'String email;'), ('phone', 2, 'String phone;'))
+    head = results(('email', 5, 'String email;'), ('address', 6, 'String address;'))
+    delta = diff_file_results('f', base, head)
+    assert [(entry['field_name'], entry['line_number']) for entry in delta['demographic_added']] == [('address', 6)]
+    assert [(entry['field_name'], entry['line_number']) for entry in delta['demographic_removed']] == [('phone', 2)]
+    assert delta['integration_added'] == delta['integration_removed'] == []
+
+
+def test_differential_scan_reports_head_versions_and_changes(history, monkeypatch):
+    from codescan import CodeAnalyzer
+
+    repo, base, head = history
+    monkeypatch.chdir(repo)
+    results = CodeAnalyzer(str(repo), "delta", base_ref=base).scan_repository()
+    delta = results['delta']
+    assert sorted((entry['status'], entry['file_path']) for entry in delta['files']) == [
+        ('A', str(repo / "Added.java")),
+        ('D', str(repo / "Gone.java")),
+        ('M', str(repo / "src" / "Customer.java")),
+        ('R', str(repo / "src" / "New Name.java")),
+    ]
+    assert results['summary']['files_analyzed'] == 3
+    assert sorted(entry['field_name'] for entry in delta['demographic_added']) == ['address', 'city']
+    assert sorted(entry['field_name'] for entry in delta['demographic_removed']) == ['passport', 'phone']
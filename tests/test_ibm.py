@@ -0,0 +1,66 @@
+from ibm import tokenize_cobol
+
+
+def cobol(*lines):
+    return ''.join(f"{line}\n" for line in lines)
+
+
+def test_multi_line_exec_sql_drops_comments_and_sequence_numbers():
+    text = cobol(
+        "000100     EXEC SQL",
+        "000200       UPDATE CUST SET A = 1 WHERE B IN",
+        "000300*        FROM NOTME",
+        "000400         (SELECT B FROM",
+        "000500          OTHER)                                                  IDENTIFI",
+        "000600     END-EXEC.",
+    )
+    assert tokenize_cobol(text) == [('SQL', ['UPDATE', 'CUST']), ('SQL', ['SELECT', 'OTHER'])]
+
+
+def test_continuation_and_inline_comment_inside_exec_block():
+    text = cobol(
+        "           EXEC SQL SELECT A FROM TAB *> FROM NOTME",
+        "      -      LE9 END-EXEC.",
+    )
+    assert tokenize_cobol(text) == [('SQL', ['SELECT', 'TABLE9'])]
+
+
+def test_comment_lines_and_embedded_keywords_are_ignored():
+    text = cobol(
+        "      * COPY COMMENTED. CALL 'NOPE'",
+        "           MOVE XCOPY TO A. PERFORM-EXEC SQL X.",
+        "           COPY CUSTREC.",
+        "           CALL 'PGM1' USING WS-AREA. *> CALL 'PGM2'",
+    )
+    assert tokenize_cobol(text) == [('COPY', 'CUSTREC'), ('CALL', 'PGM1')]
+
+
+def test_missing_end_exec_keeps_later_events():
+    text = cobol(
+        "           EXEC SQL",
+        "             SELECT A INTO :B FROM CUST",
+        "           COPY LATER.",
+        "           CALL 'PGM1'.",
+    )
+    assert tokenize_cobol(text) == [('COPY', 'LATER'), ('CALL', 'PGM1')]
+
+
+def test_exec_sql_include_and_cics_link():
+    text = cobol(
+        "           EXEC SQL INCLUDE CUSTREC END-EXEC.",
+        "           EXEC SQL INCLUDE SQLCA END-EXEC.",
+        "           EXEC CICS LINK PROGRAM('PGMX')",
+        "                COMMAREA(WS) END-EXEC.",
+    )
+    assert tokenize_cobol(text) == [('COPY', 'CUSTREC'), ('CALL', 'PGMX')]
+
+
+def test_keywords_inside_string_literals_are_ignored():
+    text = cobol(
+        "           MOVE 'COPY FOO' TO X.",
+        "           DISPLAY \"CALL 'X'\".",
+        "           MOVE 'IT''S COPY BAR' TO Y. CALL 'REAL1'.",
+        "           DISPLAY 'EXEC SQL SELECT A FROM T END-EXEC'.",
+        "           MOVE '*>' TO Z. COPY REALCPY.",
+    )
+    assert tokenize_cobol(text) == [('CALL', 'REAL1'), ('COPY', 'REALCPY')]
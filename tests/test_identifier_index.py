@@ -0,0 +1,66 @@
+from identifier_index import index_identifiers
+
+JAVA_SOURCE = '''package com.acme;
+import java.util.List;
+
+@Entity
+public class Customer {
+    // String commentOnly;
+    private String firstName;
+    /* int hidden; */
+    public List<String> emails;
+    public String getSsn(int customerId) {
+        String url = "https://api.acme.com/v1";
+        return repo.lookup(customerId).ssn;
+    }
+}
+'''
+
+PYTHON_SOURCE = '''"""Module docstring mentions email"""
+import requests
+
+@app.route("/customers")
+def lookup(customer_id, *, zip_code=None):
+    """Docstring with ssn"""
+    # comment with phone
+    email = fetch(customer_id)
+    record.first_name = email
+    requests.get(url, timeout=5)
+    return email
+'''
+
+
+def test_java_declarations_members_annotations_and_literals():
+    assert index_identifiers(JAVA_SOURCE, 'Java') == {
+        '@Entity': [4],
+        'Customer': [5],
+        'firstName': [7],
+        'emails': [9],
+        'getSsn': [10],
+        'customerId': [10],
+        'url': [11],
+        'https://api.acme.com/v1': [11],
+        'lookup': [12],
+        'ssn': [12],
+    }
+
+
+def test_python_names_attributes_decorators_and_literals():
+    # Docstrings, comments, imports and plain reads (fetch, url, requests) are left out
+    assert index_identifiers(PYTHON_SOURCE, 'Python') == {
+        '@app.route': [4],
+        'route': [4],
+        '/customers': [4],
+        'lookup': [5],
+        'customer_id': [5],
+        'zip_code': [5],
+        'email': [8],
+        'first_name': [9],
+        'get': [10],
+        'timeout': [10],
+    }
+
+
+def test_unparsable_or_unsupported_sources_return_none():
+    assert index_identifiers('def broken(:\n', 'Python') is None
+    assert index_identifiers('puts email', 'Ruby') is None
@@ -0,0 +1,75 @@
+import json
+import random
+import re
+
+import pytest
+
+from pattern_packs import KeywordIndex, PatternPackError, field_list_pattern, literal_alternatives, load_pack
+
+
+def write_pack(tmp_path, data):
+    path = tmp_path / "pack.json"
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+@pytest.mark.parametrize("data", [
+    {'demographic': ['acct_no']},
+    {'integration': ['x']},
+    {'fingerprints': [1]},
+    {'languages': [5]},
+    {'languages': '.java'},
+    {'name': ['acme']},
+    {'demographic': {'account': {'fields': 'acct_no'}}},
+    {'demographic': {'account': 5}},
+])
+def test_malformed_pack_raises_pattern_pack_error(tmp_path, data):
+    with pytest.raises(PatternPackError):
+        load_pack(write_pack(tmp_path, data), cache_dir=None)
+
+
+def test_cache_is_json_and_reused(tmp_path):
+    cache_dir = tmp_path / "cache"
+    path = write_pack(tmp_path, {'demographic': {'account': {'fields': ['acct_no', 'iban']}}})
+    pack = load_pack(path, cache_dir=str(cache_dir))
+    cached = list(cache_dir.iterdir())
+    assert [p.suffix for p in cached] == ['.json']
+    assert json.loads(cached[0].read_text())['pack'] == pack
+    assert load_pack(path, cache_dir=str(cache_dir)) == pack
+
+
+def test_malformed_cache_is_rebuilt(tmp_path):
+    cache_dir = tmp_path / "cache"
+    path = write_pack(tmp_path, {'name': 'acme'})
+    load_pack(path, cache_dir=str(cache_dir))
+    cache_file = next(cache_dir.iterdir())
+    cache_file.write_text(json.dumps({'version': 2, 'pack': {'name': 1}}))
+    assert load_pack(path, cache_dir=str(cache_dir))['name'] == 'acme'
+
+
+FIELD_LISTS = [
+    ['acct', 'acct_no', 'account', 'account number', 'e-mail', 'c#', 'tax.id', 'id'],
+    ['first name', 'name', 'first', 'ssn', 'mail'],
+]
+LINE_WORDS = ['acct', 'acct_no', 'account', 'number', 'e-mail', 'email', 'c#', 'c#x', 'tax.id', 'taxid', 'id',
+              'ID', 'First', 'Name', 'first_name', 'ssn2', 'mail', '-', '.', '#', '(', '"', '_']
+
+
+def test_keyword_index_finds_the_same_spans_as_finditer():
+    index = KeywordIndex()
+    slots = []
+    for fields in FIELD_LISTS:
+        pattern = field_list_pattern(fields)
+        slots.append((index.add(literal_alternatives(pattern)), re.compile(pattern, re.IGNORECASE)))
+    index.build()
+
+    rng = random.Random(0)
+    lines = ['Account Number: acct_no, e-mail c# tax.id', 'first name first_name ssn ssn2 mail e-mail']
+    lines += [
+        ''.join(rng.choice(LINE_WORDS) + rng.choice(['', ' ', '  ']) for _ in range(rng.randrange(1, 12)))
+        for _ in range(500)
+    ]
+    for line in lines:
+        spans = index.find(line)
+        for slot, regex in slots:
+            assert spans.get(slot, []) == [match.span() for match in regex.finditer(line)], line
@@ -0,0 +1,39 @@
+import json
+
+from portfolio import PortfolioAnalyzer
+
+
+def test_missing_repository_is_recorded_and_others_still_scanned(tmp_path_factory, monkeypatch):
+    # tmp_path would be named after the test, and paths containing 'test_' are skipped
+    root = tmp_path_factory.mktemp("portfolio")
+    monkeypatch.chdir(root)
+    source = root / "billing"
+    source.mkdir()
+    (source / "Customer.java").write_text('class Customer {\n    String email;\n}\n')
+
+    portfolio = PortfolioAnalyzer(
+        [("billing", str(source)), ("gone", str(root / "missing"))], workers=1, app_reports=False
+    )
+    assert portfolio.analyzers[0]._matchers is portfolio.analyzers[1]._matchers
+    results = portfolio.scan_portfolio()
+
+    assert list(results['applications']) == ["billing"]
+    assert results['applications']['billing']['summary']['files_analyzed'] == 1
+    assert [failure['application_name'] for failure in results['rollup']['failed_applications']] == ["gone"]
+    json.dumps(results['rollup'])
+
+
+def test_unreadable_file_is_listed_as_failed(tmp_path_factory, monkeypatch):
+    root = tmp_path_factory.mktemp("portfolio")
+    monkeypatch.chdir(root)
+    source = root / "billing"
+    source.mkdir()
+    (source / "Customer.java").write_text('class Customer {\n    String email;\n}\n')
+    (source / "Latin1.java").write_bytes(b'class Latin1 { String name = "\xff"; }\n')
+
+    results = PortfolioAnalyzer([("billing", str(source))], workers=1, app_reports=False).scan_portfolio()
+
+    summary = results['applications']['billing']['summary']
+    assert summary['files_analyzed'] == 1
+    assert [failure['file_path'] for failure in summary['failed_files']] == [str(source / "Latin1.java")]
+    assert results['rollup']['files_failed'] == 1
@@ -0,0 +1,27 @@
+from source_masking import mask_noise, split_like
+
+UPDATE_SQL = '"UPDATE customers SET first_name = ?, last_name = ?, ssn = ?, dob = ? WHERE customer_id = ?"'
+
+
+def test_long_update_string_is_kept():
+    text = f"query = {UPDATE_SQL}\n"
+    assert mask_noise(text, 'Python') == text
+
+
+def test_long_mixed_case_update_string_is_kept():
+    text = f"String q = {UPDATE_SQL.replace('UPDATE', 'Update')};\n"
+    assert mask_noise(text, 'Java') == text
+
+
+def test_prefixed_sql_string_is_kept():
+    text = f"query = r{UPDATE_SQL}\n"
+    assert mask_noise(text, 'Python') == text
+
+
+def test_long_prose_string_and_comments_are_blanked():
+    prose = '"Unable to find the customer record, please check the first_name and ssn fields"'
+    text = f"msg = {prose}  # first_name\nx = 1\n"
+    masked = mask_noise(text, 'Python')
+    assert 'first_name' not in masked
+    assert len(masked) == len(text)
+    assert split_like(masked, text.splitlines(keepends=True))[1] == "x = 1\n"
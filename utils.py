@@ -1,42 +1,68 @@
 import streamlit as st
 import os
+import io
+import hashlib
+from functools import lru_cache
 from pathlib import Path
 from pygments import highlight, lexers, util
 from pygments.lexers import get_lexer_by_name
-from pygments.formatters import TerminalFormatter
+from pygments.formatters import HtmlFormatter, TerminalFormatter
+
+# Extension -> (display name, Pygments lexer name) for the scanner's supported languages
+LANGUAGE_MAP = {
+    '.py': ('Python', 'python'),
+    '.js': ('JavaScript', 'javascript'),
+    '.ts': ('TypeScript', 'typescript'),
+    '.java': ('Java', 'java'),
+    '.cs': ('C#', 'csharp'),
+    '.php': ('PHP', 'php'),
+    '.rb': ('Ruby', 'ruby'),
+    '.xsd': ('XML Schema', 'xml')
+}
+
+# Content guessing runs every registered lexer, so only a prefix of the content is used
+GUESS_CONTENT_LIMIT = 2048
+
+@lru_cache(maxsize=None)
+def get_cached_lexer(lexer_name: str):
+    """Return one shared lexer instance per Pygments lexer name"""
+    return get_lexer_by_name(lexer_name)
+
+@lru_cache(maxsize=256)
+def _language_for_extension(ext: str):
+    """Resolve a file extension to (display name, lexer), or None if Pygments has no match"""
+    if ext in LANGUAGE_MAP:
+        name, lexer_name = LANGUAGE_MAP[ext]
+        return name, get_cached_lexer(lexer_name)
+    if not ext:
+        return None
+    try:
+        lexer = lexers.get_lexer_for_filename(f"file{ext}")
+        return lexer.name, lexer
+    except util.ClassNotFound:
+        return None
 
 def detect_language(file_path: str, content: str = None) -> tuple:
-    """Detect programming language from file extension and content"""
+    """Detect programming language from file extension, falling back to content"""
     try:
-        # First try to guess from content if provided
+        # Extension lookup is a cached dict hit, so try it first
+        _, ext = os.path.splitext(file_path or '')
+        language = _language_for_extension(ext.lower())
+        if language:
+            return language
+
+        # Bounded content-based guess for unknown extensions
         if content:
             try:
-                lexer = lexers.guess_lexer(content)
+                lexer = lexers.guess_lexer(content[:GUESS_CONTENT_LIMIT])
                 return lexer.name, lexer
             except util.ClassNotFound:
                 pass
 
-        # Try to guess from file extension
-        _, ext = os.path.splitext(file_path)
-        language_map = {
-            '.py': ('Python', 'python'),
-            '.js': ('JavaScript', 'javascript'),
-            '.ts': ('TypeScript', 'typescript'),
-            '.java': ('Java', 'java'),
-            '.cs': ('C#', 'csharp'),
-            '.php': ('PHP', 'php'),
-            '.rb': ('Ruby', 'ruby'),
-            '.xsd': ('XML Schema', 'xml')
-        }
-
-        if ext in language_map:
-            name, lexer_name = language_map[ext]
-            return name, get_lexer_by_name(lexer_name)
-
         # Default to Python if unable to detect
-        return 'Unknown', get_lexer_by_name('python')
+        return 'Unknown', get_cached_lexer('python')
     except Exception:
-        return 'Unknown', get_lexer_by_name('python')
+        return 'Unknown', get_cached_lexer('python')
 
 def display_code_with_highlights(code_snippet: str, line_number: int, file_path: str = None):
     """Display code with syntax highlighting and language detection"""
@@ -57,26 +83,225 @@ def display_code_with_highlights(code_snippet: str, line_number: int, file_path:
     except Exception:
         st.code(code_snippet)
 
-def create_file_tree(path: str):
-    """Create an interactive file tree visualization"""
-    try:
-        for root, dirs, files in os.walk(path):
-            level = root.replace(path, '').count(os.sep)
-            indent = ' ' * 4 * level
-            folder_name = os.path.basename(root)
-            if level == 0:
-                st.markdown("📁 **/**")
-            else:
-                st.markdown(f"{indent}📁 **{folder_name}**")
-
-            subindent = ' ' * 4 * (level + 1)
-            for file in files:
-                if file.endswith(('.py', '.java', '.js', '.ts', '.cs', '.php', '.rb', '.xsd')):
-                    # Detect language for the file
-                    try:
-                        language_name, _ = detect_language(file)
-                        st.markdown(f"{subindent}📄 {file} `{language_name}`")
-                    except:
-                        st.markdown(f"{subindent}📄 {file}")
-    except Exception as e:
-        st.error(f"Error creating file tree: {str(e)}")
+HIGHLIGHT_CSS_CLASS = 'codelens-hl'
+# Rendered ranges kept by st.cache_data, keyed by content hash, language, line range and hit lines
+HIGHLIGHT_CACHE_SIZE = 512
+
+def collect_hit_lines(results: dict) -> dict:
+    """Group demographic and integration hit line numbers by file path"""
+    hit_lines = {}
+    for file_path, fields in results['demographic_data'].items():
+        lines = hit_lines.setdefault(file_path, set())
+        for field in fields.values():
+            lines.update(occurrence['line_number'] for occurrence in field['occurrences'])
+    for pattern in results['integration_patterns']:
+        hit_lines.setdefault(pattern['file_path'], set()).add(pattern['line_number'])
+    return {file_path: sorted(lines) for file_path, lines in hit_lines.items()}
+
+def merge_line_ranges(line_numbers, context: int = 0, max_line: int = None) -> list:
+    """Merge hit lines, widened by context lines, into sorted non-overlapping (start, end) ranges"""
+    ranges = []
+    for line_number in sorted(set(line_numbers)):
+        start = max(1, line_number - context)
+        end = line_number + context if max_line is None else min(max_line, line_number + context)
+        if start > end:
+            continue
+        if ranges and start <= ranges[-1][1] + 1:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    return [tuple(r) for r in ranges]
+
+@lru_cache(maxsize=1)
+def highlight_css() -> str:
+    """CSS for the HTML emitted by highlight_file_hits"""
+    return HtmlFormatter(cssclass=HIGHLIGHT_CSS_CLASS).get_style_defs(f'.{HIGHLIGHT_CSS_CLASS}')
+
+def highlight_file_hits(file_path: str, line_numbers, context: int = 2, raw: bytes = None) -> list:
+    """
+    Highlight the merged hit ranges of one file, reading it once unless its raw content is given.
+    Returns [(start, end, html)]; rendered HTML is cached by file hash and line range.
+    """
+    if raw is None:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+    file_hash = hashlib.sha1(raw).hexdigest()
+    # Same line numbering as the scanner's readlines()
+    lines = io.StringIO(raw.decode('utf-8', errors='replace'), newline=None).readlines()
+    hits = set(line_numbers)
+
+    return [
+        (start, end, _highlight_range(file_hash, file_path, lines[start - 1:end], start, hits))
+        for start, end in merge_line_ranges(hits, context, len(lines))
+    ]
+
+def highlight_context_windows(file_path: str, windows: list, line_numbers) -> list:
+    """
+    Highlight context windows captured during the scan (see CodeAnalyzer.capture_context),
+    for sources that cannot be re-read such as encrypted or deleted uploads.
+    """
+    hits = set(line_numbers)
+    rendered = []
+    for window in windows:
+        code = window['code']
+        code_hash = hashlib.sha1(code.encode('utf-8')).hexdigest()
+        lines = code.splitlines(keepends=True)
+        rendered.append((
+            window['start_line'],
+            window['end_line'],
+            _highlight_range(code_hash, file_path, lines, window['start_line'], hits)
+        ))
+    return rendered
+
+def _highlight_range(content_hash: str, file_path: str, lines: list, start: int, hits: set) -> str:
+    """Highlight lines numbered from start as HTML, marking hit lines, through the shared cache"""
+    end = start + len(lines) - 1
+    # Encrypted sources are highlighted as the language they wrap
+    source_path = file_path[:-len('.enc')] if file_path.endswith('.enc') else file_path
+    extension = os.path.splitext(source_path)[1].lower()
+    range_hits = tuple(n for n in range(start, end + 1) if n in hits)
+    return _cached_highlight(content_hash, extension, start, end, range_hits, lines)
+
+@st.cache_data(max_entries=HIGHLIGHT_CACHE_SIZE, show_spinner=False)
+def _cached_highlight(content_hash: str, extension: str, start: int, end: int, range_hits: tuple,
+                      _lines: list) -> str:
+    """Rendered HTML for one range; _lines is not hashed, content_hash stands in for it"""
+    _, lexer = detect_language(f"file{extension}")
+    formatter = HtmlFormatter(
+        cssclass=HIGHLIGHT_CSS_CLASS,
+        linenos='inline',
+        linenostart=start,
+        hl_lines=[n - start + 1 for n in range_hits]
+    )
+    return highlight(''.join(_lines), lexer, formatter)
+
+def display_highlighted_hits(hit_lines: dict, key: str, files_per_page: int = 10, context: int = 2,
+                             context_windows: dict = None, read_source=None):
+    """
+    Render highlighted hits one page of files at a time, one element per file.
+    hit_lines maps file path -> hit line numbers (see collect_hit_lines); context
+    windows captured by the scan are used when the source cannot be re-read.
+    read_source(file_path) -> bytes replaces reading from disk, e.g. for the
+    scanned git revision of a differential scan.
+    """
+    context_windows = context_windows or {}
+    files = sorted(hit_lines)
+    if not files:
+        st.info("No hits to display")
+        return
+
+    total_pages = max(1, -(-len(files) // files_per_page))
+    if st.session_state.get(f"{key}_page", 1) > total_pages:
+        st.session_state[f"{key}_page"] = 1
+    page = st.number_input(
+        f"Page (of {total_pages})",
+        min_value=1,
+        max_value=total_pages,
+        step=1,
+        key=f"{key}_page"
+    )
+    start = (int(page) - 1) * files_per_page
+
+    for file_path in files[start:start + files_per_page]:
+        line_numbers = hit_lines[file_path]
+        st.markdown(f"📄 **{os.path.basename(file_path)}** — {len(line_numbers)} hit lines")
+        st.caption(file_path)
+        try:
+            if file_path.endswith('.enc'):
+                raise FileNotFoundError(file_path)
+            raw = read_source(file_path) if read_source else None
+            blocks = highlight_file_hits(file_path, line_numbers, context, raw)
+        except OSError:
+            if file_path not in context_windows:
+                st.info("Source not readable; scan with context lines to keep snippets")
+                continue
+            blocks = highlight_context_windows(file_path, context_windows[file_path], line_numbers)
+        # st.markdown cuts raw HTML at the first blank line, which highlighted code often contains
+        st.html(f"<style>{highlight_css()}</style>" + ''.join(html for _, _, html in blocks))
+
+    st.caption(f"Showing files {start + 1}-{min(start + files_per_page, len(files))} of {len(files)}")
+
+def build_file_tree(file_details: list, root: str = None) -> dict:
+    """
+    Build a directory tree model from the scan's file details, once per scan.
+    Every directory node carries aggregated file, demographic and integration counts.
+    """
+    def new_node():
+        return {'dirs': {}, 'files': [], 'file_count': 0, 'demographic': 0, 'integration': 0}
+
+    tree = new_node()
+    for detail in file_details:
+        file_path = detail['file_path']
+        relative = os.path.relpath(file_path, root) if root else file_path
+        *dir_parts, file_name = Path(relative).parts
+        demographic = detail['demographic_fields_found']
+        integration = detail['integration_patterns_found']
+
+        node = tree
+        for part in [None] + dir_parts:
+            if part is not None:
+                node = node['dirs'].setdefault(part, new_node())
+            node['file_count'] += 1
+            node['demographic'] += demographic
+            node['integration'] += integration
+        node['files'].append((file_name, demographic, integration))
+    return tree
+
+def create_file_tree(tree: dict, key: str = "file_tree", max_entries: int = 200):
+    """
+    Render a tree from build_file_tree. Directories are collapsed by default and
+    only the contents of expanded directories are rendered, max_entries per page.
+    """
+    st.markdown(
+        f"📁 **/** — {tree['file_count']} files · "
+        f"{tree['demographic']} demographic · {tree['integration']} integration"
+    )
+    _render_tree_node(tree, (), 1, key, max_entries)
+
+def _render_tree_node(node: dict, parts: tuple, level: int, key: str, max_entries: int):
+    """Render one page of a directory level, recursing into expanded subdirectories"""
+    indent = '\u2003' * 2 * level
+    dir_names = sorted(node['dirs'])
+    files = sorted(node['files'])
+    node_key = f"{key}:{'/'.join(parts)}"
+
+    # Subdirectories first, then files, paged together once a directory outgrows one page
+    total = len(dir_names) + len(files)
+    start = 0
+    if total > max_entries:
+        total_pages = -(-total // max_entries)
+        if st.session_state.get(f"{node_key}:page", 1) > total_pages:
+            st.session_state[f"{node_key}:page"] = 1
+        page = st.number_input(
+            f"{indent}Page (of {total_pages}) — {total} entries",
+            min_value=1,
+            max_value=total_pages,
+            step=1,
+            key=f"{node_key}:page"
+        )
+        start = (int(page) - 1) * max_entries
+    end = start + max_entries
+
+    for name in dir_names[start:end]:
+        child = node['dirs'][name]
+        child_parts = parts + (name,)
+        # The checkbox state lives in session_state, so expansion survives reruns
+        expanded = st.checkbox(
+            f"{indent}📁 {name} — {child['file_count']} files · "
+            f"{child['demographic']} demographic · {child['integration']} integration",
+            key=f"{key}:{'/'.join(child_parts)}"
+        )
+        if expanded:
+            _render_tree_node(child, child_parts, level + 1, key, max_entries)
+
+    page_files = files[max(0, start - len(dir_names)):max(0, end - len(dir_names))]
+    if page_files:
+        # All files of a page go into a single element
+        rows = []
+        for file_name, demographic, integration in page_files:
+            resolved = _language_for_extension(os.path.splitext(file_name)[1].lower())
+            row = f"{indent}📄 {file_name}" + (f" `{resolved[0]}`" if resolved else "")
+            if demographic or integration:
+                row += f" · {demographic} demographic · {integration} integration"
+            rows.append(row)
+        st.markdown("  \n".join(rows))